@@ -0,0 +1,201 @@
+"""
+Backups incrementales, comprimidos y rotativos
+
+Cada backup es un archivo gzip en config.BACKUP_DIR:
+
+    000001-full-20250115T103000000000.yaml.gz    snapshot completo (YAML)
+    000002-delta-20250115T113000000000.jsonl.gz  eventos desde el backup anterior
+
+Una cadena es un snapshot más los deltas que lo siguen. Un delta sólo
+contiene los eventos registrados desde el backup anterior, así que su costo es
+proporcional a lo que cambió. Cada BACKUP_SNAPSHOT_EVERY deltas (o si los datos
+cambiaron por completo) se empieza una cadena nueva con un snapshot, y se
+conservan las últimas BACKUP_KEEP_CHAINS cadenas.
+
+restore() reconstruye los datos en cualquier instante cubierto: el último
+snapshot anterior a ese instante más sus deltas hasta ese instante.
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import config
+import storage
+import utils
+
+BACKUP_NAME = re.compile(r'^(\d{6})-(full|delta)-(\d{8}T\d{12})\.(yaml|jsonl)\.gz$')
+TIME_FORMAT = '%Y%m%dT%H%M%S%f'
+
+# Estado persistente: clean=True sólo tras un cierre limpio con todo respaldado.
+# Si no (cierre abrupto, cambios desde la línea de comandos...) el próximo
+# backup es un snapshot completo
+STATE_FILE = 'estado.json'
+
+def parse_point(point) -> Optional[datetime]:
+    """Instante de restauración: datetime, texto ISO o None (el más reciente)"""
+    if point is None or isinstance(point, datetime):
+        return point
+    return datetime.fromisoformat(point)
+
+class BackupManager:
+    """
+    Backups de un almacenamiento (storage.YamlStore o sqlite_store.SQLiteStore)
+    record() se llama con cada lote de eventos persistido, con store.lock
+    tomado desde que se aplicaron; backup() escribe el delta (o un snapshot) y
+    puede ejecutarse en otro hilo
+    """
+
+    def __init__(self, backup_dir: str = None):
+        self.backup_dir = backup_dir or config.BACKUP_DIR
+        self.lock = threading.Lock()
+        # Eventos (username, tipo, fecha) desde el último backup
+        self.pending_events: List[Tuple[str, str, str]] = []
+        # Si la sesión anterior no cerró limpio la cadena puede no tener todos los cambios
+        self.clean = self.read_state().get('clean', False)
+        self.full_needed = not self.clean
+
+    def read_state(self) -> Dict:
+        """Leer el estado persistente (vacío si no hay backups)"""
+        try:
+            with open(os.path.join(self.backup_dir, STATE_FILE), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def write_state(self, clean: bool) -> None:
+        """Guardar si la última cadena refleja todos los cambios"""
+        self.clean = clean
+        os.makedirs(self.backup_dir, exist_ok=True)
+        path = os.path.join(self.backup_dir, STATE_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'clean': clean}, file)
+        os.replace(path + '.tmp', path)
+
+    def list_backups(self) -> List[Tuple[int, str, datetime, str]]:
+        """Backups existentes como (secuencia, tipo, instante, ruta), en orden"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.backup_dir):
+            match = BACKUP_NAME.match(name)
+            if match:
+                entries.append((int(match.group(1)), match.group(2),
+                                datetime.strptime(match.group(3), TIME_FORMAT),
+                                os.path.join(self.backup_dir, name)))
+        entries.sort()
+        return entries
+
+    def record(self, events: List[Tuple[str, str, str]]) -> None:
+        """Anotar eventos ya persistidos para el próximo delta"""
+        with self.lock:
+            self.pending_events.extend(events)
+            if self.clean:
+                self.write_state(False)
+
+    def mark_full(self) -> None:
+        """Los datos cambiaron por completo: el próximo backup será un snapshot"""
+        with self.lock:
+            self.full_needed = True
+            self.pending_events = []
+        self.write_state(False)
+
+    def backup(self, store) -> Optional[str]:
+        """
+        Escribir un delta con los eventos pendientes o, si toca, un snapshot
+        Retorna la ruta del archivo escrito (None si no había cambios)
+        """
+        entries = self.list_backups()
+        deltas_in_chain = 0
+        for _, kind, _, _ in reversed(entries):
+            if kind == 'full':
+                break
+            deltas_in_chain += 1
+
+        # Con store.lock tomado ningún evento queda aplicado pero sin anotar,
+        # así el snapshot y los eventos pendientes no se solapan
+        with store.lock:
+            with self.lock:
+                full = (self.full_needed or not entries
+                        or deltas_in_chain >= config.BACKUP_SNAPSHOT_EVERY)
+                events = self.pending_events
+                self.pending_events = []
+                self.full_needed = False
+            snapshot = store.begin_snapshot() if full else None
+
+        if not full and not events:
+            return None
+
+        sequence = entries[-1][0] + 1 if entries else 1
+        stamp = datetime.now().strftime(TIME_FORMAT)
+        try:
+            if full:
+                # La copia de los usuarios se hace fuera de store.lock (ver storage.UserSnapshot)
+                follows_data = snapshot.detach()
+                path = os.path.join(self.backup_dir, f"{sequence:06d}-full-{stamp}.yaml.gz")
+                self.write_file(path, lambda file: storage.yaml_dump(follows_data, file))
+            else:
+                path = os.path.join(self.backup_dir, f"{sequence:06d}-delta-{stamp}.jsonl.gz")
+                self.write_file(path, lambda file: file.writelines(
+                    json.dumps([username, tipo, fecha], ensure_ascii=False) + '\n'
+                    for username, tipo, fecha in events))
+        except Exception:
+            # Reintentar en el próximo backup
+            with self.lock:
+                if full:
+                    self.full_needed = True
+                self.pending_events[:0] = events
+            raise
+
+        self.rotate()
+        return path
+
+    def close(self, store) -> None:
+        """Último delta al cerrar; si no queda nada pendiente la próxima sesión sigue la cadena"""
+        self.backup(store)
+        with self.lock:
+            if not self.pending_events and not self.full_needed:
+                self.write_state(True)
+
+    def write_file(self, path: str, write) -> None:
+        """Escribir un backup comprimido de forma atómica"""
+        import gzip
+        os.makedirs(self.backup_dir, exist_ok=True)
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as file:
+            write(file)
+        os.replace(path + '.tmp', path)
+
+    def rotate(self) -> None:
+        """Borrar las cadenas más antiguas que BACKUP_KEEP_CHAINS"""
+        entries = self.list_backups()
+        chain_starts = [i for i, entry in enumerate(entries) if entry[1] == 'full']
+        if len(chain_starts) <= config.BACKUP_KEEP_CHAINS:
+            return
+        first_kept = chain_starts[-config.BACKUP_KEEP_CHAINS]
+        for _, _, _, path in entries[:first_kept]:
+            os.remove(path)
+
+    def restore(self, point=None) -> Optional[List[Dict]]:
+        """
+        Reconstruir los datos en un instante (None: el backup más reciente)
+        Retorna None si no hay un snapshot anterior a ese instante
+        """
+        point = parse_point(point)
+        entries = [entry for entry in self.list_backups() if point is None or entry[2] <= point]
+        starts = [i for i, entry in enumerate(entries) if entry[1] == 'full']
+        if not starts:
+            return None
+
+        import gzip
+        chain = entries[starts[-1]:]
+        with gzip.open(chain[0][3], 'rt', encoding='utf-8') as file:
+            follows_data = storage.yaml_load(file) or []
+        index = utils.build_user_index(follows_data)
+        for _, _, _, path in chain[1:]:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    username, tipo, fecha = json.loads(line)
+                    utils.apply_event(follows_data, index, username, tipo, fecha)
+        return follows_data
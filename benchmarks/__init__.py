@@ -0,0 +1,11 @@
+"""
+Benchmarks de FollowTracker
+
+    python -m benchmarks.dataset follows.yaml --users 100000   # generar datos sintéticos
+    python -m benchmarks.run --users 100000 --output bench.json
+    python -m benchmarks.records_memory 100000 4
+
+run.py mide las rutas principales (carga, guardado, búsqueda, estados,
+filtros, estadísticas, tabla, CSV y backups) y emite los resultados en JSON
+para comparar entre commits.
+"""
@@ -0,0 +1,83 @@
+"""
+Generador de datos sintéticos con la forma de follows.yaml
+
+Los historiales siguen transiciones plausibles (seguir, follow back, dejar de
+seguir, te sigue) con fechas crecientes, y los estados y fechas derivados se
+calculan con utils.transition_state, igual que al registrar eventos.
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+import storage
+import utils
+
+# Próximo evento más probable según el estado actual: (tipo, peso)
+NEXT_EVENTS = {
+    'no_seguido': (('seguido', 8), ('te_sigue', 2)),
+    'seguido': (('follow_back', 5), ('dejado_de_seguir', 4), ('seguido', 1)),
+    'mutuo': (('dejado_de_seguir', 8), ('follow_back', 2)),
+    'te_sigue': (('seguido', 6), ('follow_back', 3), ('te_sigue', 1)),
+    'seguido_previamente': (('seguido', 7), ('te_sigue', 3)),
+}
+NEXT_EVENT_CHOICES = {estado: ([tipo for tipo, _ in choices], [peso for _, peso in choices])
+                      for estado, choices in NEXT_EVENTS.items()}
+
+def history_length(rng: random.Random, events_per_user: int, distribution: str) -> int:
+    """Número de eventos de un usuario: fijo o geométrico con esa media (mínimo 1)"""
+    if distribution == 'fixed' or events_per_user <= 1:
+        return max(events_per_user, 1)
+    return 1 + int(rng.expovariate(1 / (events_per_user - 1)))
+
+def generate_users(total_users: int, events_per_user: int = 5, seed: int = 1,
+                   distribution: str = 'geometric', start: date = date(2020, 1, 1)) -> List[Dict]:
+    """Lista de usuarios en el formato del YAML"""
+    rng = random.Random(seed)
+    follows_data = []
+    for i in range(total_users):
+        day = start + timedelta(days=rng.randrange(1500))
+        estado = 'no_seguido'
+        primer_seguimiento = None
+        eventos = []
+        for _ in range(history_length(rng, events_per_user, distribution)):
+            day += timedelta(days=rng.randrange(1, 60))
+            tipos, pesos = NEXT_EVENT_CHOICES[estado]
+            tipo = rng.choices(tipos, pesos)[0]
+            fecha = day.isoformat()
+            eventos.append({'tipo': tipo, 'fecha': fecha})
+            if tipo == 'seguido' and primer_seguimiento is None:
+                primer_seguimiento = fecha
+            estado = utils.transition_state(estado, tipo)
+        follows_data.append({
+            'username': f"@usuario_{i:07d}",
+            'eventos': eventos,
+            'fecha_primer_seguimiento': primer_seguimiento,
+            'fecha_ultima_interaccion': eventos[-1]['fecha'],
+            'estado_actual': estado
+        })
+    return follows_data
+
+def write_dataset(data_file: str, total_users: int, events_per_user: int = 5,
+                  seed: int = 1, distribution: str = 'geometric') -> List[Dict]:
+    """Generar un dataset y guardarlo como snapshot YAML; retorna los usuarios"""
+    follows_data = generate_users(total_users, events_per_user, seed, distribution)
+    storage.save_snapshot(data_file, follows_data)
+    return follows_data
+
+def main(argv=None):
+    """Generar un follows.yaml sintético desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Generar un follows.yaml sintético")
+    parser.add_argument('output')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--events', type=int, default=5, help="eventos por usuario (media)")
+    parser.add_argument('--distribution', choices=('geometric', 'fixed'), default='geometric')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    follows_data = write_dataset(args.output, args.users, args.events, args.seed, args.distribution)
+    total_events = sum(len(user['eventos']) for user in follows_data)
+    print(f"✓ {len(follows_data)} usuarios y {total_events} eventos en {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Memoria de los usuarios en memoria: dicts del YAML contra records.UserRecord
+
+    python -m benchmarks.records_memory [usuarios] [eventos_por_usuario]
+
+Genera datos sintéticos, mide con tracemalloc lo que ocupa cada
+representación y comprueba que la conversión vuelve al mismo YAML.
+"""
+
+import sys
+import tracemalloc
+import records
+from benchmarks import dataset
+
+def generate_users(total_users: int, events_per_user: int):
+    """Usuarios sintéticos con exactamente events_per_user eventos cada uno"""
+    return dataset.generate_users(total_users, events_per_user, distribution='fixed')
+
+def measure(build):
+    """Bytes asignados (y aún vivos) por build() y su resultado"""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+def main():
+    total_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    events_per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    dict_size, follows_data = measure(lambda: generate_users(total_users, events_per_user))
+    compact_size, compact_data = measure(lambda: records.compact_users(follows_data))
+
+    assert records.plain_users(compact_data) == follows_data, "la conversión no es reversible"
+
+    print(f"{total_users} usuarios, {total_users * events_per_user} eventos")
+    print(f"  dicts:      {dict_size / 2**20:8.1f} MiB ({dict_size / total_users:.0f} B/usuario)")
+    print(f"  UserRecord: {compact_size / 2**20:8.1f} MiB ({compact_size / total_users:.0f} B/usuario)")
+    print(f"  reducción:  {1 - compact_size / dict_size:8.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Suite de benchmarks de FollowTracker con salida JSON
+
+    python -m benchmarks.run --users 100000 --events 5 --output bench.json
+
+Genera un dataset sintético en un directorio temporal y mide carga,
+guardado, búsquedas, actualización de estados, filtros, estadísticas,
+series temporales, la tabla (con un Treeview simulado, sin ventana) y las
+funciones de CSV y backups de utils. También mide el arranque en procesos
+nuevos: el intérprete solo, la importación de main (como -X importtime) y,
+si hay pantalla, la ventana completa hasta tener los datos cargados. Cada medición guarda el mínimo y la mediana de --repeat
+ejecuciones en segundos; el JSON incluye el commit y la configuración para
+poder comparar resultados entre commits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+import backups
+import config
+import storage
+import timeseries
+import utils
+from benchmarks import dataset
+
+class StubTree:
+    """Treeview mínimo para medir la tabla sin Tk (sólo las llamadas que usa FollowTracker)"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def insert(self, parent, index, iid=None, values=()):
+        self.rows[iid] = values
+
+    def item(self, iid, values=None):
+        self.rows[iid] = values
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.rows[iid]
+
+    def set_children(self, parent, *iids):
+        self.rows = {iid: self.rows[iid] for iid in iids}
+
+    def configure(self, **options):
+        pass
+
+    def yview(self, *args):
+        pass
+
+class StubVar:
+    """Sustituto de tk.StringVar"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+class StubScrollbar:
+    """Sustituto de la scrollbar de la tabla"""
+
+    def set(self, first, last):
+        pass
+
+    def configure(self, **options):
+        pass
+
+def make_table_app(store):
+    """
+    FollowTracker con la tabla simulada, para medir refresh_table
+    Retorna None si tkinter no está disponible (main lo importa)
+    """
+    try:
+        import main
+    except ImportError:
+        return None
+    app = object.__new__(main.FollowTracker)
+    app.store = store
+    app.tree = StubTree()
+    app.table_scrollbar = StubScrollbar()
+    app.filter_var = StubVar("todos")
+    app.table_rows = {}
+    app.table_order_dirty = False
+    app.virtual_table = False
+    app.view_rows = []
+    app.table_offset = 0
+    app.sort_column = None
+    app.sort_reverse = False
+    app.select_all_view = False
+    # Una ventana de 30 filas, sin consultar el estilo de Tk
+    app.get_table_page_size = lambda: 30
+    return app
+
+def summarize_runs(runs: List[float]) -> Dict:
+    """Mínimo, mediana y todas las duraciones"""
+    return {'min': min(runs), 'median': statistics.median(runs), 'runs': runs}
+
+def timed(fn: Callable, repeat: int, setup: Callable = None) -> Dict:
+    """Ejecutar fn repeat veces (setup antes de cada una, sin medir)"""
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return summarize_runs(runs)
+
+def parse_importtime(stderr: str) -> List[Tuple[str, float, float]]:
+    """Líneas de -X importtime como (módulo, propio, acumulado) en segundos"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own) / 1e6, int(cumulative) / 1e6))
+    return modules
+
+def run_process(args: List[str], cwd: str, env: Dict = None) -> Tuple[float, subprocess.CompletedProcess]:
+    """Ejecutar un proceso de Python nuevo y medir su duración total"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=cwd, capture_output=True, text=True,
+                            env=dict(os.environ, **(env or {})), timeout=600)
+    return time.perf_counter() - start, result
+
+def measure_startup(workdir: str, repeat: int) -> Dict:
+    """
+    Arranque en frío: intérprete vacío, importación de main y la ventana
+    completa (main con FOLLOWTRACKER_STARTUP_REPORT, ver FollowTracker.report_startup)
+    """
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {'PYTHONPATH': repo_dir}
+    results = {}
+
+    results['startup_python'] = summarize_runs([run_process(['-c', 'pass'], workdir)[0]
+                                         for _ in range(repeat)])
+
+    runs = []
+    imports = []
+    for _ in range(repeat):
+        seconds, result = run_process(['-X', 'importtime', '-c', 'import main'], workdir, env)
+        if result.returncode != 0:
+            return dict(results, startup_import={'skipped': result.stderr.strip().splitlines()[-1]})
+        runs.append(seconds)
+        imports.append(parse_importtime(result.stderr))
+    results['startup_import'] = summarize_runs(runs)
+    results['startup_import']['import_main'] = statistics.median(
+        cumulative for modules in imports for name, _, cumulative in modules if name == 'main')
+    results['startup_import']['slowest'] = [
+        {'module': name, 'self': own, 'cumulative': cumulative}
+        for name, own, cumulative in sorted(imports[-1], key=lambda m: m[1], reverse=True)[:10]]
+
+    runs = []
+    stages = []
+    for _ in range(repeat):
+        seconds, result = run_process([os.path.join(repo_dir, 'main.py')], workdir,
+                                      dict(env, FOLLOWTRACKER_STARTUP_REPORT='1'))
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            # Sin pantalla (DISPLAY) Tk no puede crear la ventana
+            error = result.stderr.strip().splitlines()
+            return dict(results, startup_window={'skipped': error[-1] if error else 'sin salida'})
+        runs.append(seconds)
+        stages.append(json.loads(lines[-1]))
+    results['startup_window'] = summarize_runs(runs)
+    results['startup_window']['stages'] = {
+        stage: statistics.median(times[stage] for times in stages) for stage in stages[0]}
+    return results
+
+def git_commit() -> str:
+    """Commit actual del repositorio (vacío si no es un checkout de git)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def run_suite(total_users: int, events_per_user: int, repeat: int, workdir: str,
+              seed: int = 1, progress: Callable[[str], None] = None) -> Dict:
+    """Ejecutar todos los benchmarks y retornar el resultado como dict"""
+    results = {}
+    rng = random.Random(seed)
+
+    def bench(name: str, fn: Callable, times: int = None, setup: Callable = None, ops: int = None):
+        if progress:
+            progress(name)
+        result = timed(fn, times or repeat, setup)
+        if ops:
+            result['ops'] = ops
+            result['ops_per_second'] = ops / result['min'] if result['min'] else None
+        results[name] = result
+
+    data_file = os.path.join(workdir, 'follows.yaml')
+    start = time.perf_counter()
+    follows_data = dataset.write_dataset(data_file, total_users, events_per_user, seed)
+    generate_seconds = time.perf_counter() - start
+    total_events = sum(len(user['eventos']) for user in follows_data)
+    usernames = [user['username'] for user in follows_data]
+    del follows_data
+
+    # Carga y guardado
+    bench('load_data', lambda: storage.load_data(data_file))
+    store = storage.YamlStore(data_file, None, config.COMPACT_RECORDS)
+    bench('store_load', store.load)
+    bench('save_data', store.save)
+
+    # Búsquedas
+    sample = [rng.choice(usernames) for _ in range(10000)]
+    sample += [f"@no_existe_{i}" for i in range(1000)]
+    bench('lookup', lambda: [store.get_user(username) for username in sample], ops=len(sample))
+
+    # Estados: transición O(1) y recorrido completo del historial
+    users = [store.get_user(username) for username in sample[:10000]]
+    state_users = []
+
+    def copy_states():
+        state_users[:] = [{'estado_actual': user['estado_actual'], 'eventos': []} for user in users]
+
+    def copy_histories():
+        state_users[:] = [{'eventos': list(user['eventos'])} for user in users]
+
+    bench('update_user_state', lambda: [utils.update_user_state(user, 'seguido') for user in state_users],
+          setup=copy_states, ops=len(users))
+    bench('replay_user_state', lambda: [utils.replay_user_state(user) for user in state_users],
+          setup=copy_histories, ops=len(users))
+
+    # Eventos nuevos (índice, cubetas y órdenes incluidos)
+    events = [(rng.choice(usernames), rng.choice(list(config.EVENT_TYPES)), '2026-01-01')
+              for _ in range(10000)]
+    bench('apply_events', lambda: store.apply_events(events), times=1, ops=len(events))
+
+    # Filtros
+    estados = [estado for estado, _ in config.FILTER_OPTIONS]
+    bench('filter_data', lambda: [store.filter_users(estado) for estado in estados],
+          ops=len(estados))
+    bench('filter_data_sorted_first', lambda: store.filter_users('todos', 'fecha_ultima_interaccion'),
+          times=1)
+    bench('filter_data_sorted', lambda: [store.filter_users(estado, 'fecha_ultima_interaccion')
+                                         for estado in estados], ops=len(estados))
+
+    # Estadísticas: contadores mantenidos y recuento completo
+    bench('update_statistics', lambda: utils.calculate_follow_back_rate(
+        utils.calculate_user_statistics(None, store.get_state_counts())))
+    bench('count_states', lambda: utils.count_states(store.user_index.values()))
+
+    # Series temporales: construcción completa y un evento nuevo sobre las ya construidas
+    def reset_timeseries():
+        store.timeseries = None
+    bench('timeseries_build', store.get_timeseries, setup=reset_timeseries, ops=total_events)
+    bench('timeseries_rollup', lambda: [store.get_timeseries().rollup(period)
+                                        for period in timeseries.PERIODS], ops=len(timeseries.PERIODS))
+    bench('apply_events_timeseries', lambda: store.apply_events(events[:1000]), times=1, ops=1000)
+
+    # Tabla
+    app = make_table_app(store)
+    if app is None:
+        results['refresh_table'] = {'skipped': 'tkinter no disponible'}
+    else:
+        def reset_table():
+            app.tree = StubTree()
+            app.table_rows = {}
+            app.virtual_table = False
+            app.filter_var.set('seguido_previamente')
+        bench('refresh_table_full', app.refresh_table, setup=reset_table)
+        bench('refresh_table_unchanged', app.refresh_table)
+        app.filter_var.set('todos')
+        bench('refresh_table_virtual', app.refresh_table)
+
+    # CSV
+    all_users = store.all_users()
+    csv_file = os.path.join(workdir, 'export.csv')
+    events_csv_file = os.path.join(workdir, 'eventos.csv')
+    bench('export_to_csv', lambda: utils.export_to_csv(all_users, csv_file))
+    bench('import_from_csv', lambda: utils.import_from_csv(csv_file))
+    bench('export_events_csv', lambda: utils.export_events_csv(store.iter_users(), events_csv_file))
+    bench('iter_events_csv', lambda: sum(1 for _ in utils.iter_events_csv(events_csv_file)))
+
+    # Backups
+    backup_file = os.path.join(workdir, 'backup.yaml')
+    bench('backup_data', lambda: utils.backup_data(all_users, backup_file))
+    bench('restore_backup', lambda: utils.restore_backup(backup_file))
+    del all_users
+
+    manager = backups.BackupManager(os.path.join(workdir, 'backups'))
+    bench('backup_full', lambda: manager.backup(store), times=1)
+    delta_events = events[:1000]
+
+    def record_delta():
+        store.apply_events(delta_events)
+        manager.record(delta_events)
+    bench('backup_delta', lambda: manager.backup(store), setup=record_delta)
+    bench('backup_restore', manager.restore, times=1)
+
+    # Arranque (con el dataset como datos principales)
+    if progress:
+        progress('startup')
+    results.update(measure_startup(workdir, repeat))
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'yaml_backend': storage.get_yaml_backend(),
+            'compact_records': config.COMPACT_RECORDS,
+            'numpy': timeseries.get_numpy() is not None,
+            'users': total_users,
+            'events': total_events,
+            'events_per_user': events_per_user,
+            'repeat': repeat,
+            'seed': seed,
+            'generate_seconds': generate_seconds
+        },
+        'results': results
+    }
+
+def main(argv: List[str] = None):
+    """Ejecutar la suite desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmarks de FollowTracker (salida JSON)")
+    parser.add_argument('--users', type=int, default=10000, help="usuarios del dataset (10k a 1M)")
+    parser.add_argument('--events', type=int, default=5, help="eventos por usuario (media)")
+    parser.add_argument('--repeat', type=int, default=3, help="ejecuciones por medición")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="archivo JSON (por defecto, la salida estándar)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='followtracker-bench-') as workdir:
+        report = run_suite(args.users, args.events, args.repeat, workdir, args.seed,
+                           progress=lambda name: print(f"… {name}", file=sys.stderr))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+        print(f"✓ Resultados en {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
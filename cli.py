@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+FollowTracker en modo línea de comandos (sin Tk)
+
+    python cli.py apply eventos.jsonl     # registrar un archivo de eventos
+    python cli.py user @ejemplo           # estado e historial de una cuenta
+    python cli.py stats                   # estadísticas
+    python cli.py trends --periodo semana # eventos y tasa de follow back por periodo
+    python cli.py export datos.csv        # exportar (.csv o .yaml)
+    python cli.py import datos.csv        # reemplazar los datos por un CSV exportado
+    python cli.py backup                  # backup completo en config.BACKUP_DIR
+    python cli.py restore --at 2025-01-15T10:00  # restaurar un instante
+    python cli.py --cuenta x/mi_cuenta stats     # otra cuenta (ver shards.py)
+    python cli.py accounts                # resumen de todas las cuentas
+
+El archivo de eventos puede ser JSON por líneas, con el formato del journal
+({"username": ..., "tipo": ..., "fecha": ...}), o CSV con las columnas
+username, tipo y fecha. Si falta la fecha se usa la de hoy. Cada ejecución
+carga los datos una vez y, si hubo cambios, los guarda una vez al final.
+
+El CSV de export/import tiene una fila por evento (ver
+utils.CSV_EVENT_FIELDS), así que conserva el historial completo; se lee y se
+escribe en streaming.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Iterator, Tuple
+import backups
+import config
+import shards
+import storage
+import timeseries
+import utils
+
+def normalize_username(username: str) -> str:
+    """Agregar la @ inicial, igual que la búsqueda de la interfaz"""
+    username = username.strip()
+    return username if username.startswith('@') else '@' + username
+
+def restore_point(value: str):
+    """Instante de --at (ver backups.parse_point); un texto inválido es un error de uso"""
+    try:
+        return backups.parse_point(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"instante inválido: {value} (p. ej. 2025-01-15T10:00)")
+
+def read_events_file(filename: str, skipped: list) -> Iterator[dict]:
+    """
+    Recorrer las filas de un archivo de eventos (CSV o JSON por líneas)
+    Las líneas que no son un objeto JSON se agregan a skipped (el journal, en
+    cambio, las ignora en silencio: ver storage.EventJournal.read)
+    """
+    if os.path.splitext(filename)[1].lower() == '.csv':
+        with open(filename, 'r', newline='', encoding='utf-8') as file:
+            yield from csv.DictReader(file)
+        return
+    with open(filename, 'r', encoding='utf-8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                skipped.append(line)
+                continue
+            yield row
+
+def iter_events(filename: str, skipped: list) -> Iterator[Tuple[str, str, str]]:
+    """
+    Eventos válidos (username, tipo, fecha) de un archivo
+    Las filas sin username, con un tipo desconocido o que no se pueden leer se
+    agregan a skipped
+    """
+    today = utils.get_current_date()
+    for row in read_events_file(filename, skipped):
+        username = (row.get('username') or '').strip()
+        event_type = row.get('tipo')
+        if not username or event_type not in config.EVENT_TYPES:
+            skipped.append(row)
+            continue
+        yield normalize_username(username), event_type, row.get('fecha') or today
+
+def open_data(shard: shards.Shard):
+    """Abrir y cargar el almacenamiento de una cuenta"""
+    store = shard.open_store()
+    store.load()
+    return store
+
+def data_replaced(shard: shards.Shard) -> None:
+    """Los cambios de la línea de comandos no van a un delta: el próximo backup será completo"""
+    if os.path.isdir(shard.backup_dir):
+        backups.BackupManager(shard.backup_dir).mark_full()
+
+def cmd_apply(store, args) -> int:
+    """Registrar todos los eventos de un archivo con un solo guardado"""
+    skipped = []
+    total = store.apply_events(iter_events(args.events_file, skipped))
+    if total:
+        store.save()
+        data_replaced(args.shard)
+    print(f"✓ {total} eventos registrados")
+    if skipped:
+        print(f"⚠ {len(skipped)} filas ignoradas (inválidas, sin username o tipo desconocido)")
+    return 0
+
+def cmd_user(store, args) -> int:
+    """Mostrar estado, fechas e historial de una cuenta"""
+    username = normalize_username(args.username)
+    user = store.get_user(username)
+    if user is None:
+        print(f"{config.MESSAGES['user_not_found']}: {username}")
+        return 1
+
+    print(username)
+    print(f"  Estado: {user.get('estado_actual', 'N/A')}")
+    for field, label in (('fecha_primer_seguimiento', 'Primer seguimiento'),
+                         ('fecha_ultima_interaccion', 'Última interacción')):
+        fecha = user.get(field)
+        print(f"  {label}: {utils.format_date(fecha) if fecha else 'N/A'}")
+
+    eventos = store.get_events(username)
+    if eventos:
+        print("  Historial:")
+        for evento in eventos:
+            print(f"    • {utils.format_date(evento['fecha'])}: {evento['tipo']}")
+    return 0
+
+def cmd_stats(store, args) -> int:
+    """Mostrar las estadísticas de la interfaz"""
+    stats = utils.calculate_user_statistics(None, store.get_state_counts())
+    labels = {
+        'total_usuarios': 'Total usuarios',
+        'seguidos_actualmente': 'Seguidos actualmente',
+        'te_siguen': 'Te siguen',
+        'relaciones_mutuas': 'Relaciones mutuas',
+        'dejados_seguir': 'Dejados de seguir',
+        'no_seguidos': 'No seguidos'
+    }
+    for key, label in labels.items():
+        print(f"{label}: {stats[key]}")
+    print(f"Tasa follow back: {utils.calculate_follow_back_rate(stats)}")
+    return 0
+
+def cmd_trends(store, args) -> int:
+    """Eventos por tipo y tasa de follow back por día, semana o mes"""
+    rows = store.get_timeseries().rollup(args.periodo)
+    if args.ultimos:
+        rows = rows[-args.ultimos:]
+    print(f"{timeseries.PERIOD_LABELS[args.periodo]:<12} {'Seguidos':>9} {'Follow back':>12} "
+          f"{'Dejados':>8} {'Te siguen':>10} {'Tasa':>7} {'Acumulada':>10}")
+    for row in rows:
+        print(f"{row['periodo']:<12} {row['seguido']:>9} {row['follow_back']:>12} "
+              f"{row['dejado_de_seguir']:>8} {row['te_sigue']:>10} "
+              f"{timeseries.format_rate(row['tasa_follow_back']):>7} "
+              f"{timeseries.format_rate(row['tasa_acumulada']):>10}")
+    return 0
+
+def cmd_export(store, args) -> int:
+    """Exportar todos los usuarios a CSV (una fila por evento) o YAML según la extensión"""
+    if os.path.splitext(args.output)[1].lower() == '.csv':
+        utils.export_events_csv(store.iter_users(), args.output)
+    else:
+        storage.save_snapshot(args.output, store.all_users())
+    print(f"✓ {store.total_users()} usuarios exportados a {args.output}")
+    return 0
+
+def cmd_import(store, args) -> int:
+    """Reemplazar todos los datos por los de un CSV exportado con export"""
+    store.set_data(utils.iter_events_csv(args.input))
+    store.save()
+    data_replaced(args.shard)
+    print(f"✓ {store.total_users()} usuarios importados de {args.input}")
+    return 0
+
+def cmd_backup(store, args) -> int:
+    """Backup completo (empieza una cadena nueva)"""
+    manager = backups.BackupManager(args.shard.backup_dir)
+    manager.mark_full()
+    manager.close(store)
+    print(f"✓ Backup completo en {manager.backup_dir}")
+    return 0
+
+def cmd_restore(store, args) -> int:
+    """Reemplazar los datos por los de un backup en un instante dado"""
+    manager = backups.BackupManager(args.shard.backup_dir)
+    follows_data = manager.restore(args.at)
+    if follows_data is None:
+        print(f"No hay backups en {manager.backup_dir} anteriores a {args.at or 'ahora'}")
+        return 1
+    store.set_data(follows_data)
+    store.save()
+    manager.mark_full()
+    print(f"✓ {store.total_users()} usuarios restaurados")
+    return 0
+
+def cmd_accounts(store, args) -> int:
+    """Estadísticas de todas las cuentas desde sus resúmenes, sin cargar sus datos"""
+    summary = shards.summarize(shards.list_shards())
+    print(f"{'Cuenta':<32} {'Usuarios':>9} {'Seguidos':>9} {'Te siguen':>10} {'Mutuos':>7} "
+          f"{'Tasa':>7}  Actualizado")
+    for shard, stats, updated in summary['cuentas']:
+        if stats is None:
+            print(f"{shard.label:<32} {'(sin resumen)':>9}")
+            continue
+        print(f"{shard.label:<32} {stats['total_usuarios']:>9} {stats['seguidos_actualmente']:>9} "
+              f"{stats['te_siguen']:>10} {stats['relaciones_mutuas']:>7} "
+              f"{utils.calculate_follow_back_rate(stats):>7}  {updated}")
+    total = summary['total']
+    print(f"{'Total':<32} {total['total_usuarios']:>9} {total['seguidos_actualmente']:>9} "
+          f"{total['te_siguen']:>10} {total['relaciones_mutuas']:>7} "
+          f"{utils.calculate_follow_back_rate(total):>7}")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(prog='followtracker',
+                                     description=config.APP_DESCRIPTION + " (modo línea de comandos)")
+    parser.add_argument('--data', default=config.DATA_FILE,
+                        help=f"archivo de datos (por defecto {config.DATA_FILE})")
+    parser.add_argument('--cuenta', help="cuenta red/nombre (p. ej. instagram/mi_cuenta); "
+                                         "por defecto los datos principales")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    apply_parser = subparsers.add_parser('apply', help="registrar un archivo de eventos")
+    apply_parser.add_argument('events_file', help="CSV o JSON por líneas con username, tipo y fecha")
+    apply_parser.set_defaults(handler=cmd_apply, writes=True)
+
+    user_parser = subparsers.add_parser('user', help="consultar una cuenta")
+    user_parser.add_argument('username')
+    user_parser.set_defaults(handler=cmd_user)
+
+    stats_parser = subparsers.add_parser('stats', help="mostrar estadísticas")
+    stats_parser.set_defaults(handler=cmd_stats)
+
+    trends_parser = subparsers.add_parser('trends', help="eventos y tasa de follow back por periodo")
+    trends_parser.add_argument('--periodo', choices=timeseries.PERIODS, default='mes')
+    trends_parser.add_argument('--ultimos', type=int, help="mostrar sólo los últimos N periodos")
+    trends_parser.set_defaults(handler=cmd_trends)
+
+    export_parser = subparsers.add_parser('export', help="exportar los datos")
+    export_parser.add_argument('output', help="archivo .csv o .yaml")
+    export_parser.set_defaults(handler=cmd_export)
+
+    import_parser = subparsers.add_parser('import', help="reemplazar los datos por un CSV exportado")
+    import_parser.add_argument('input', help="CSV con una fila por evento")
+    import_parser.set_defaults(handler=cmd_import, writes=True)
+
+    backup_parser = subparsers.add_parser('backup', help="crear un backup completo")
+    backup_parser.set_defaults(handler=cmd_backup)
+
+    restore_parser = subparsers.add_parser('restore', help="restaurar desde los backups")
+    restore_parser.add_argument('--at', type=restore_point, help="instante ISO (p. ej. 2025-01-15T10:00); por defecto el último")
+    restore_parser.set_defaults(handler=cmd_restore, writes=True)
+
+    accounts_parser = subparsers.add_parser('accounts', help="resumen de todas las cuentas")
+    accounts_parser.set_defaults(handler=cmd_accounts, load=False)
+    return parser
+
+def main(argv=None) -> int:
+    """Función principal del modo línea de comandos"""
+    args = build_parser().parse_args(argv)
+    try:
+        args.shard = shards.parse_key(args.cuenta) if args.cuenta else shards.principal(args.data)
+    except ValueError as e:
+        print(e)
+        return 2
+    if not getattr(args, 'load', True):
+        return args.handler(None, args)
+    store = open_data(args.shard)
+    result = args.handler(store, args)
+    if getattr(args, 'writes', False):
+        # Resumen de la cuenta para 'accounts' y el resumen de cuentas de la interfaz
+        args.shard.write_stats(store.get_state_counts())
+    return result
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,8 +14,47 @@ WINDOW_MIN_WIDTH = 800
 WINDOW_MIN_HEIGHT = 600
 
 # Configuración de archivos
+# Con extensión .db/.sqlite/.sqlite3 se usa el backend SQLite (ver sqlite_store.py)
 DATA_FILE = "follows.yaml"
 BACKUP_FILE = "follows_backup.yaml"
+JOURNAL_FILE = "follows.journal"
+
+# Backups incrementales (ver backups.py): cada BACKUP_INTERVAL_MIN minutos se
+# escribe un delta comprimido con los eventos nuevos; cada BACKUP_SNAPSHOT_EVERY
+# deltas, un snapshot completo. Se conservan BACKUP_KEEP_CHAINS snapshots con
+# sus deltas. BACKUP_INTERVAL_MIN = 0 desactiva los backups automáticos
+BACKUP_DIR = "backups"
+BACKUP_INTERVAL_MIN = 30
+BACKUP_SNAPSHOT_EVERY = 20
+BACKUP_KEEP_CHAINS = 5
+
+# Journal de eventos: cada evento se agrega al journal en lugar de reescribir
+# DATA_FILE, que se compacta cada JOURNAL_COMPACT_EVERY eventos
+USE_JOURNAL = True
+JOURNAL_COMPACT_EVERY = 500
+
+# Guardados completos diferidos: se escribe DATA_FILE cuando pasan
+# SAVE_DELAY_MS sin cambios nuevos, en un hilo aparte (ver storage.WriteBehindSaver)
+SAVE_DELAY_MS = 1000
+
+# Recalcular estado_actual de todos los usuarios desde sus eventos al cargar.
+# Normalmente no hace falta: cada evento actualiza el estado en O(1)
+REPLAY_STATES_ON_LOAD = False
+
+# Guardar los usuarios en memoria como records.UserRecord (fechas ordinales y
+# eventos en arrays) en lugar de dicts; reduce mucho la memoria con muchos eventos
+COMPACT_RECORDS = True
+
+# Filas por bloque al exportar el historial completo a CSV (utils.export_events_csv)
+CSV_CHUNK_ROWS = 10000
+
+# Mediciones de rendimiento (ver perf.py): también se activan con la variable
+# de entorno FOLLOWTRACKER_PERF=1 (o =cprofile). PERF_WINDOW es el número de
+# muestras por ruta para los percentiles y PERF_TRACE_LIMIT el máximo de
+# entradas de la traza de la sesión
+PERF_ENABLED = False
+PERF_WINDOW = 1000
+PERF_TRACE_LIMIT = 200000
 
 # Configuración de la interfaz
 FONT_FAMILY = "Arial"
@@ -48,7 +87,8 @@ USER_STATES = {
 EVENT_TYPES = {
     'seguido': 'Cuando sigues a alguien',
     'follow_back': 'Cuando alguien te sigue de vuelta',
-    'dejado_de_seguir': 'Cuando dejas de seguir a alguien'
+    'dejado_de_seguir': 'Cuando dejas de seguir a alguien',
+    'te_sigue': 'Cuando alguien te sigue sin que tú lo sigas'
 }
 
 # Configuración de redes sociales
@@ -57,9 +97,33 @@ SOCIAL_NETWORKS = {
         'name': 'Instagram',
         'url_template': 'https://instagram.com/{username}',
         'icon': '📷'
+    },
+    'x': {
+        'name': 'X',
+        'url_template': 'https://x.com/{username}',
+        'icon': '✖'
+    },
+    'tiktok': {
+        'name': 'TikTok',
+        'url_template': 'https://www.tiktok.com/@{username}',
+        'icon': '🎵'
+    },
+    'threads': {
+        'name': 'Threads',
+        'url_template': 'https://www.threads.net/@{username}',
+        'icon': '🧵'
     }
 }
 
+# Cuentas (ver shards.py): además de los datos principales (DATA_FILE), cada
+# cuenta de cada red tiene sus propios datos, journal y backups en
+# ACCOUNTS_DIR/<red>/<cuenta>/. Sólo se carga la cuenta seleccionada; las
+# últimas ACCOUNT_CACHE_SIZE usadas quedan en memoria para cambiar al instante.
+# Los datos principales son de la red DEFAULT_NETWORK
+ACCOUNTS_DIR = "cuentas"
+ACCOUNT_CACHE_SIZE = 3
+DEFAULT_NETWORK = 'instagram'
+
 # Configuración de la tabla
 TABLE_COLUMNS = {
     'username': {
@@ -84,6 +148,17 @@ TABLE_COLUMNS = {
     }
 }
 
+# Tabla virtual: a partir de este número de filas filtradas la tabla sólo
+# crea items para las filas visibles (más VIRTUAL_TABLE_BUFFER de margen)
+VIRTUAL_TABLE_THRESHOLD = 5000
+VIRTUAL_TABLE_BUFFER = 5
+
+# Sugerencias de la búsqueda: espera tras la última tecla, número máximo de
+# sugerencias y si se agregan coincidencias aproximadas (índice de trigramas)
+SUGGEST_DELAY_MS = 150
+SUGGEST_LIMIT = 8
+FUZZY_SEARCH = True
+
 # Configuración de filtros
 FILTER_OPTIONS = [
     ("todos", "Todos los usuarios"),
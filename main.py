@@ -3,50 +3,377 @@
 FollowTracker - Aplicación para gestionar interacciones en redes sociales
 """
 
+import time
+# Inicio del arranque, antes de importar lo demás (ver FollowTracker.mark_startup)
+STARTUP_START = time.perf_counter()
+
+import os
+import queue
+import threading
+from collections import OrderedDict
 import tkinter as tk
 from tkinter import ttk, messagebox
-import yaml
-import os
-from datetime import datetime
-import webbrowser
 from typing import Dict, List, Optional
+import config
+import perf
+import search_index
+import shards
+import timeseries
+import utils
 
 class FollowTracker:
     def __init__(self):
+        # Tiempos de arranque (segundos desde que se empezó a importar main), ver mark_startup
+        self.startup_start = STARTUP_START
+        self.startup_times = {}
+        self.mark_startup('importaciones')
+        
         self.root = tk.Tk()
         self.root.title("FollowTracker")
         self.root.geometry("1200x900")
         self.root.configure(bg='#f0f0f0')
         
-        # Configurar el archivo de datos
-        self.data_file = "follows.yaml"
-        self.follows_data = self.load_data()
+        # Cuentas (ver shards.py): sólo se carga la seleccionada y las últimas
+        # ACCOUNT_CACHE_SIZE usadas quedan abiertas. Cada una tiene su
+        # almacenamiento (YAML o SQLite), sus guardados completos agrupados y
+        # fuera del hilo de la UI y sus backups incrementales periódicos
+        self.sessions = OrderedDict()
+        self.activate_session(shards.ShardSession(shards.read_active()))
+        self.backup_job = None
+        # Filas mostradas en la tabla: username (iid del Treeview) -> valores
+        self.table_rows = {}
+        self.table_order_dirty = False
+        # Modo virtual de la tabla: sólo se crean filas para la ventana visible
+        self.virtual_table = False
+        self.view_rows = []
+        self.table_offset = 0
+        # Orden de la tabla (clic en el encabezado de una columna)
+        self.sort_column = None
+        self.sort_reverse = False
+        # "Seleccionar todo" en modo virtual: la selección son todas las filas
+        # filtradas, no sólo las de la ventana visible
+        self.select_all_view = False
+        
+        # Sugerencias de búsqueda: el índice se construye tras la carga de datos
+        self.search_index = None
+        self.pending_search_names = []
+        self.suggest_job = None
+        
+        # Tabla de usuarios (ver create_table)
+        self.tree = None
         
         # Variables de control
         self.search_var = tk.StringVar()
         self.filter_var = tk.StringVar(value="todos")
         
+        # La ventana se muestra enseguida; los datos se cargan en segundo plano
         self.setup_ui()
         self.update_statistics()
+        self.start_background_load()
+        self.root.after(0, lambda: self.mark_startup('ventana'))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Panel oculto de rendimiento (F12), sólo con las mediciones activadas
+        self.perf_window = None
+        if perf.ENABLED:
+            self.root.bind('<F12>', lambda e: self.show_performance_panel())
+        self.root.after(500, self.poll_save_errors)
+        
+    def mark_startup(self, stage: str):
+        """Registrar el tiempo transcurrido desde el inicio hasta una etapa del arranque"""
+        # Sólo la primera vez: al cambiar de cuenta se vuelve a pasar por las mismas etapas
+        self.startup_times.setdefault(stage, time.perf_counter() - self.startup_start)
+    
+    def check_startup_report(self):
+        """Programar report_startup cuando la ventana esté completa y los datos cargados"""
+        if (os.environ.get('FOLLOWTRACKER_STARTUP_REPORT') and not self.loading
+                and 'interactiva' in self.startup_times):
+            self.root.after_idle(self.report_startup)
+    
+    def report_startup(self):
+        """
+        Con FOLLOWTRACKER_STARTUP_REPORT=1, imprimir los tiempos de arranque como
+        JSON y cerrar (lo usa benchmarks.run para medir el arranque)
+        """
+        import json
+        print(json.dumps(self.startup_times), flush=True)
+        self.on_close()
+    
+    def start_background_load(self):
+        """Cargar los datos en un hilo de trabajo mostrando un indicador de carga"""
+        self.loading = True
+        self.load_queue = queue.Queue()
+        
+        ttk.Label(self.user_info_frame, text="Cargando datos...").grid(row=0, column=0, sticky=tk.W)
+        progress = ttk.Progressbar(self.user_info_frame, mode='indeterminate', length=200)
+        progress.grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        progress.start(10)
+        
+        threading.Thread(target=self.load_data_worker, args=(self.session,), daemon=True).start()
+        self.root.after(50, self.poll_background_load)
+    
+    def load_data_worker(self, session: shards.ShardSession):
+        """Hilo de trabajo: cargar el almacenamiento de una cuenta (sin tocar Tk)"""
+        try:
+            session.load()
+            result = None
+        except Exception as e:
+            result = e
+        self.load_queue.put(result)
+    
+    def poll_background_load(self):
+        """Esperar el resultado del hilo de carga y aplicarlo por etapas"""
+        try:
+            result = self.load_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self.poll_background_load)
+            return
+        
+        if result is not None:
+            messagebox.showerror("Error", f"Error al cargar datos: {result}")
+        
+        self.mark_startup('datos')
+        self.root.after(0, self.finish_background_load)
+    
+    def finish_background_load(self):
+        """Rellenar tabla y estadísticas con los datos cargados"""
+        self.refresh_table()
+        self.mark_startup('tabla')
+        self.update_statistics()
+        self.mark_startup('estadisticas')
+        
+        self.loading = False
+        for widget in self.user_info_frame.winfo_children():
+            widget.destroy()
         
-    def load_data(self) -> List[Dict]:
-        """Cargar datos desde el archivo YAML"""
-        if os.path.exists(self.data_file):
+        self.start_search_index_build()
+        self.check_startup_report()
+        if self.backups is not None and self.backup_job is None:
+            self.backup_job = self.root.after(config.BACKUP_INTERVAL_MIN * 60000, self.schedule_backup)
+    
+    def schedule_backup(self):
+        """Pedir un backup incremental de la cuenta activa y programar el siguiente"""
+        self.backup_saver.schedule()
+        self.backup_job = self.root.after(config.BACKUP_INTERVAL_MIN * 60000, self.schedule_backup)
+    
+    def activate_session(self, session: shards.ShardSession):
+        """Usar una cuenta abierta: su almacenamiento, guardados y backups"""
+        self.session = session
+        self.store = session.store
+        self.saver = session.saver
+        self.backups = session.backups
+        self.backup_saver = session.backup_saver
+        self.data_file = session.shard.data_file
+        self.sessions[session.shard.key] = session
+        self.sessions.move_to_end(session.shard.key)
+        self.root.title(f"FollowTracker - {session.shard.label}")
+    
+    def switch_account(self, shard: shards.Shard):
+        """Cambiar de cuenta; si no está abierta se carga en segundo plano"""
+        if shard.key == self.session.shard.key:
+            return
+        if self.loading:
+            messagebox.showinfo("Cargando", "Los datos todavía se están cargando")
+            self.account_var.set(self.session.shard.label)
+            return
+        
+        # La cuenta anterior queda abierta; su resumen se actualiza para el resumen de cuentas
+        try:
+            self.session.write_stats()
+        except OSError:
+            pass
+        session = self.sessions.get(shard.key) or shards.ShardSession(shard)
+        self.activate_session(session)
+        self.close_old_sessions()
+        shards.write_active(shard)
+        self.account_var.set(shard.label)
+        
+        # Vaciar la vista de la cuenta anterior
+        self.search_var.set("")
+        self.hide_suggestions()
+        self.search_index = None
+        self.pending_search_names = []
+        for frame in (self.user_info_frame, self.actions_frame):
+            for widget in frame.winfo_children():
+                widget.destroy()
+        if self.table_rows:
+            self.tree.delete(*self.table_rows)
+            self.table_rows.clear()
+        self.select_all_view = False
+        self.update_selection_label()
+        
+        if session.loaded:
+            self.finish_background_load()
+        else:
+            self.start_background_load()
+    
+    def close_old_sessions(self):
+        """Cerrar las cuentas abiertas más antiguas que ACCOUNT_CACHE_SIZE"""
+        while len(self.sessions) > max(config.ACCOUNT_CACHE_SIZE, 1):
+            _, session = self.sessions.popitem(last=False)
+            for error in session.close():
+                messagebox.showerror("Error", f"Error al cerrar {session.shard.label}: {error}")
+    
+    def refresh_accounts(self):
+        """Actualizar la lista del selector de cuentas"""
+        self.account_shards = shards.list_shards()
+        if self.session.shard.key not in {shard.key for shard in self.account_shards}:
+            self.account_shards.append(self.session.shard)
+        self.account_combo.config(values=[shard.label for shard in self.account_shards])
+        self.account_var.set(self.session.shard.label)
+    
+    def on_account_select(self, event=None):
+        """Cuenta elegida en el selector"""
+        labels = [shard.label for shard in self.account_shards]
+        label = self.account_var.get()
+        if label in labels:
+            self.switch_account(self.account_shards[labels.index(label)])
+    
+    def switch_account_number(self, number: int):
+        """Ctrl+1..9: cambiar a la cuenta en esa posición del selector"""
+        if number <= len(self.account_shards):
+            self.switch_account(self.account_shards[number - 1])
+    
+    def show_new_account(self):
+        """Diálogo para agregar una cuenta de una red social"""
+        window = tk.Toplevel(self.root)
+        window.title("Nueva cuenta")
+        window.transient(self.root)
+        frame = ttk.Frame(window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        names = {config.SOCIAL_NETWORKS[network]['name']: network for network in config.SOCIAL_NETWORKS}
+        network_var = tk.StringVar(value=config.SOCIAL_NETWORKS[config.DEFAULT_NETWORK]['name'])
+        account_var = tk.StringVar()
+        ttk.Label(frame, text="Red:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        ttk.Combobox(frame, textvariable=network_var, values=list(names),
+                     state="readonly", width=15).grid(row=0, column=1, sticky=tk.W)
+        ttk.Label(frame, text="Cuenta:").grid(row=1, column=0, sticky=tk.W, padx=(0, 10), pady=(5, 0))
+        account_entry = ttk.Entry(frame, textvariable=account_var, width=25)
+        account_entry.grid(row=1, column=1, sticky=tk.W, pady=(5, 0))
+        account_entry.focus_set()
+        
+        def create(event=None):
             try:
-                with open(self.data_file, 'r', encoding='utf-8') as file:
-                    return yaml.safe_load(file) or []
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al cargar datos: {e}")
-                return []
-        return []
+                shard = shards.create_account(names[network_var.get()], account_var.get())
+            except (ValueError, OSError) as e:
+                messagebox.showerror("Error", str(e), parent=window)
+                return
+            window.destroy()
+            self.refresh_accounts()
+            self.switch_account(shard)
+        
+        account_entry.bind('<Return>', create)
+        ttk.Button(frame, text="Crear", command=create).grid(row=2, column=1, sticky=tk.E, pady=(10, 0))
+    
+    def show_accounts_summary(self):
+        """Estadísticas de todas las cuentas desde sus resúmenes guardados (sin cargarlas)"""
+        live_counts = {key: session.store.get_state_counts()
+                       for key, session in self.sessions.items() if session.loaded}
+        summary = shards.summarize(shards.list_shards(), live_counts)
+        
+        window = tk.Toplevel(self.root)
+        window.title("Resumen de cuentas")
+        window.geometry("900x300")
+        columns = ('total_usuarios', 'seguidos_actualmente', 'te_siguen', 'relaciones_mutuas',
+                   'dejados_seguir', 'tasa_follow_back', 'actualizado')
+        headings = ('Usuarios', 'Seguidos', 'Te siguen', 'Mutuos', 'Dejados de seguir',
+                    'Tasa follow back', 'Actualizado')
+        tree = ttk.Treeview(window, columns=columns)
+        tree.heading('#0', text='Cuenta')
+        tree.column('#0', width=200)
+        for column, text in zip(columns, headings):
+            tree.heading(column, text=text)
+            tree.column(column, width=90, anchor='e')
+        tree.column('actualizado', width=140)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def values(stats, updated):
+            return (*(stats[key] for key in columns[:5]),
+                    utils.calculate_follow_back_rate(stats), updated)
+        
+        for shard, stats, updated in summary['cuentas']:
+            if stats is None:
+                tree.insert('', tk.END, text=shard.label, values=('-',) * 6 + ('sin resumen',))
+            else:
+                tree.insert('', tk.END, text=shard.label, values=values(stats, updated))
+        tree.insert('', tk.END, text='Total', values=values(summary['total'], ''))
+    
+    def start_search_index_build(self):
+        """Construir el índice de sugerencias en un hilo de trabajo"""
+        usernames = self.store.usernames()
+        # Una cola por construcción: si se cambia de cuenta, el índice anterior se descarta
+        self.search_index_queue = index_queue = queue.Queue()
+        threading.Thread(
+            target=lambda: index_queue.put(
+                search_index.UsernameSearchIndex(usernames, fuzzy=config.FUZZY_SEARCH)),
+            daemon=True
+        ).start()
+        self.root.after(100, lambda: self.poll_search_index_build(index_queue))
+    
+    def poll_search_index_build(self, index_queue: queue.Queue):
+        """Activar el índice de sugerencias cuando esté listo"""
+        if index_queue is not self.search_index_queue:
+            return
+        try:
+            index = index_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(100, lambda: self.poll_search_index_build(index_queue))
+            return
+        
+        # Usuarios agregados mientras se construía el índice
+        index.add_many(self.pending_search_names)
+        self.pending_search_names = []
+        self.search_index = index
+    
+    def index_new_usernames(self, usernames: List[str]):
+        """Agregar usuarios nuevos al índice de sugerencias"""
+        if self.search_index is None:
+            self.pending_search_names.extend(usernames)
+        else:
+            self.search_index.add_many(usernames)
     
     def save_data(self):
-        """Guardar datos al archivo YAML"""
+        """Guardar todos los datos (compactando el journal), en segundo plano si se puede"""
+        if self.saver is not None:
+            self.saver.schedule()
+            return
+        try:
+            self.session.save()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al guardar datos: {e}")
+    
+    def show_background_errors(self):
+        """Mostrar los errores de los guardados y backups en segundo plano"""
+        for saver, message in ((self.saver, "Error al guardar datos"),
+                               (self.backup_saver, "Error al crear el backup")):
+            if saver is None:
+                continue
+            try:
+                error = saver.errors.get_nowait()
+            except queue.Empty:
+                continue
+            messagebox.showerror("Error", f"{message}: {error}")
+    
+    def poll_save_errors(self):
+        """Revisar periódicamente los errores de los hilos de guardado"""
+        self.show_background_errors()
+        self.root.after(500, self.poll_save_errors)
+    
+    def record_event(self, username: str, event_type: str, fecha: str):
+        """Persistir un evento: append al journal o guardado completo si no hay journal"""
+        self.record_events([(username, event_type, fecha)])
+    
+    def record_events(self, events: List[tuple]):
+        """Persistir un lote de eventos (username, tipo, fecha) con una sola escritura"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as file:
-                yaml.dump(self.follows_data, file, default_flow_style=False, allow_unicode=True)
+            save_needed = self.store.record_events(events)
         except Exception as e:
             messagebox.showerror("Error", f"Error al guardar datos: {e}")
+            return
+        if self.backups is not None:
+            self.backups.record(events)
+        if save_needed:
+            self.save_data()
     
     def setup_ui(self):
         """Configurar la interfaz de usuario"""
@@ -63,7 +390,24 @@ class FollowTracker:
         # Título
         title_label = ttk.Label(main_frame, text="FollowTracker", 
                                font=('Arial', 16, 'bold'))
-        title_label.grid(row=0, column=0, columnspan=3, pady=(0, 20))
+        title_label.grid(row=0, column=0, columnspan=2, pady=(0, 20))
+        
+        # Selector de cuentas (Ctrl+1..9 para cambiar rápido)
+        account_frame = ttk.Frame(main_frame)
+        account_frame.grid(row=0, column=2, sticky=tk.E, pady=(0, 20))
+        ttk.Label(account_frame, text="Cuenta:").pack(side=tk.LEFT, padx=(0, 5))
+        self.account_var = tk.StringVar()
+        self.account_combo = ttk.Combobox(account_frame, textvariable=self.account_var,
+                                          state="readonly", width=28)
+        self.account_combo.pack(side=tk.LEFT, padx=(0, 5))
+        self.account_combo.bind('<<ComboboxSelected>>', self.on_account_select)
+        ttk.Button(account_frame, text="Nueva...", command=self.show_new_account).pack(side=tk.LEFT)
+        ttk.Button(account_frame, text="Resumen", command=self.show_accounts_summary).pack(
+            side=tk.LEFT, padx=(5, 0))
+        self.refresh_accounts()
+        for number in range(1, 10):
+            self.root.bind(f'<Control-Key-{number}>',
+                           lambda e, number=number: self.switch_account_number(number))
         
         # Frame de búsqueda
         search_frame = ttk.LabelFrame(main_frame, text="Consulta de Cuenta", padding="10")
@@ -74,9 +418,17 @@ class FollowTracker:
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
         search_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
         search_entry.bind('<Return>', self.search_user)
+        search_entry.bind('<KeyRelease>', self.schedule_suggestions)
+        search_entry.bind('<Down>', lambda e: self.focus_suggestions())
         
         ttk.Button(search_frame, text="Buscar", command=self.search_user).grid(row=0, column=2)
         
+        # Lista de sugerencias (oculta mientras no haya resultados)
+        self.suggestions_list = tk.Listbox(search_frame, height=6, activestyle='dotbox')
+        self.suggestions_list.bind('<Return>', self.on_suggestion_select)
+        self.suggestions_list.bind('<Double-1>', self.on_suggestion_select)
+        self.suggestions_list.bind('<Escape>', lambda e: self.hide_suggestions())
+        
         # Frame de información de usuario
         self.user_info_frame = ttk.LabelFrame(main_frame, text="Información de Usuario", padding="10")
         self.user_info_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
@@ -107,6 +459,9 @@ class FollowTracker:
             self.stats_labels[key] = ttk.Label(stats_frame, text="0", font=('Arial', 10, 'bold'))
             self.stats_labels[key].grid(row=i, column=1, sticky=tk.W)
         
+        ttk.Button(stats_frame, text="Tendencias...", command=self.show_trends).grid(
+            row=len(stats), column=0, sticky=tk.W, pady=(5, 0))
+        
         # Frame de búsqueda avanzada
         advanced_frame = ttk.LabelFrame(main_frame, text="Buscador Avanzado", padding="10")
         advanced_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
@@ -124,10 +479,24 @@ class FollowTracker:
         filter_combo.pack(side=tk.LEFT, padx=(0, 10))
         filter_combo.bind('<<ComboboxSelected>>', self.apply_filter)
         
-        ttk.Button(filter_frame, text="Actualizar", command=self.refresh_table).pack(side=tk.LEFT)
+        ttk.Button(filter_frame, text="Actualizar", command=self.reload_table).pack(side=tk.LEFT)
+        ttk.Button(filter_frame, text="Importar exportación...",
+                   command=self.import_platform_export).pack(side=tk.LEFT, padx=(10, 0))
         
-        # Tabla de usuarios
-        self.create_table(advanced_frame)
+        # Acciones en lote sobre las filas seleccionadas (Ctrl/Shift+clic, Ctrl+A)
+        bulk_frame = ttk.Frame(filter_frame)
+        bulk_frame.pack(side=tk.RIGHT)
+        self.selection_label = ttk.Label(bulk_frame, text="0 seleccionados")
+        self.selection_label.pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(bulk_frame, text="Seleccionar todo",
+                   command=self.select_all_rows).pack(side=tk.LEFT, padx=(0, 10))
+        for text, event_type in (("Seguir", "seguido"), ("Follow Back", "follow_back"),
+                                 ("Dejar de Seguir", "dejado_de_seguir")):
+            ttk.Button(bulk_frame, text=text,
+                       command=lambda t=event_type: self.bulk_action(t)).pack(side=tk.LEFT, padx=(0, 5))
+        
+        # Tabla de usuarios: se construye cuando la ventana ya se mostró
+        self.root.after_idle(lambda: self.create_table(advanced_frame))
         
     def create_table(self, parent):
         """Crear la tabla de usuarios"""
@@ -139,13 +508,18 @@ class FollowTracker:
         
         # Crear Treeview
         columns = ('username', 'estado', 'fecha_primer_seguimiento', 'fecha_ultima_interaccion')
-        self.tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=10)
+        self.tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=10,
+                                 selectmode='extended')
         
-        # Configurar columnas
-        self.tree.heading('username', text='Usuario')
-        self.tree.heading('estado', text='Estado')
-        self.tree.heading('fecha_primer_seguimiento', text='Primer Seguimiento')
-        self.tree.heading('fecha_ultima_interaccion', text='Última Interacción')
+        # Configurar columnas (clic en el encabezado para ordenar)
+        self.column_titles = {
+            'username': 'Usuario',
+            'estado': 'Estado',
+            'fecha_primer_seguimiento': 'Primer Seguimiento',
+            'fecha_ultima_interaccion': 'Última Interacción'
+        }
+        for column, title in self.column_titles.items():
+            self.tree.heading(column, text=title, command=lambda c=column: self.sort_by_column(c))
         
         self.tree.column('username', width=200)
         self.tree.column('estado', width=150)
@@ -153,39 +527,106 @@ class FollowTracker:
         self.tree.column('fecha_ultima_interaccion', width=150)
         
         # Scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.table_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.table_scrollbar.set)
         
         # Grid
         self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.table_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         # Eventos
         self.tree.bind('<Double-1>', self.on_user_select)
+        self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
+        self.tree.bind('<Control-a>', lambda e: self.select_all_rows())
+        self.tree.bind('<MouseWheel>', self.on_table_wheel)
+        self.tree.bind('<Button-4>', self.on_table_wheel)
+        self.tree.bind('<Button-5>', self.on_table_wheel)
+        self.tree.bind('<Configure>', lambda e: self.render_table_window())
         
-        # Cargar datos iniciales
-        self.refresh_table()
+        # Con la tabla lista la ventana está completa
+        self.mark_startup('interactiva')
+        if not self.loading:
+            self.refresh_table()
+        self.check_startup_report()
     
+    @perf.timed('search_user')
     def search_user(self, event=None):
         """Buscar un usuario específico"""
-        username = self.search_var.get().strip()
+        if self.loading:
+            messagebox.showinfo("Cargando", "Los datos todavía se están cargando")
+            return
+        
+        if self.suggest_job is not None:
+            self.root.after_cancel(self.suggest_job)
+            self.suggest_job = None
+        self.hide_suggestions()
+        
+        username = self.get_search_username()
         if not username:
             messagebox.showwarning("Advertencia", "Por favor ingresa un nombre de usuario")
             return
         
-        # Normalizar username
-        if not username.startswith('@'):
-            username = '@' + username
-        
         # Buscar en datos
-        user_data = None
-        for user in self.follows_data:
-            if user['username'] == username:
-                user_data = user
-                break
+        user_data = self.store.get_user(username)
         
         self.display_user_info(username, user_data)
     
+    def get_search_username(self) -> str:
+        """Username del buscador con la @ inicial ('' si está vacío)"""
+        username = self.search_var.get().strip()
+        if username and not username.startswith('@'):
+            username = '@' + username
+        return username
+    
+    def schedule_suggestions(self, event=None):
+        """Programar las sugerencias; cada tecla cancela la búsqueda pendiente"""
+        if event is not None and event.keysym in ('Return', 'Down', 'Up', 'Escape'):
+            return
+        
+        if self.suggest_job is not None:
+            self.root.after_cancel(self.suggest_job)
+        self.suggest_job = self.root.after(config.SUGGEST_DELAY_MS, self.show_suggestions)
+    
+    @perf.timed('show_suggestions')
+    def show_suggestions(self):
+        """Mostrar las sugerencias para el texto actual"""
+        self.suggest_job = None
+        query = self.search_var.get().strip()
+        if self.search_index is None or not query:
+            self.hide_suggestions()
+            return
+        
+        suggestions = self.search_index.suggest(query, config.SUGGEST_LIMIT)
+        if not suggestions:
+            self.hide_suggestions()
+            return
+        
+        self.suggestions_list.delete(0, tk.END)
+        self.suggestions_list.insert(tk.END, *suggestions)
+        self.suggestions_list.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(0, 10), pady=(5, 0))
+    
+    def hide_suggestions(self):
+        """Ocultar la lista de sugerencias"""
+        self.suggestions_list.grid_remove()
+    
+    def focus_suggestions(self):
+        """Pasar el foco a la lista de sugerencias (flecha abajo en la búsqueda)"""
+        if self.suggestions_list.winfo_ismapped():
+            self.suggestions_list.focus_set()
+            self.suggestions_list.selection_clear(0, tk.END)
+            self.suggestions_list.selection_set(0)
+            self.suggestions_list.activate(0)
+    
+    def on_suggestion_select(self, event=None):
+        """Buscar el usuario elegido en la lista de sugerencias"""
+        selection = self.suggestions_list.curselection()
+        if not selection:
+            return
+        
+        self.search_var.set(self.suggestions_list.get(selection[0]))
+        self.hide_suggestions()
+        self.search_user()
+    
     def display_user_info(self, username: str, user_data: Optional[Dict]):
         """Mostrar información de usuario"""
         # Limpiar frame de información
@@ -244,34 +685,29 @@ class FollowTracker:
         return descriptions.get(estado, 'Estado desconocido')
     
     def format_date(self, date_str: str) -> str:
-        """Formatear fecha para mostrar"""
-        try:
-            from datetime import datetime
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            return date_obj.strftime("%d/%m/%Y")
-        except ValueError:
-            return date_str
+        """Formatear fecha para mostrar (usa la caché de utils.format_date)"""
+        return utils.format_date(date_str)
     
     def create_action_buttons(self, username: str, user_data: Dict):
         """Crear botones de acción con lógica de habilitación"""
         estado_actual = user_data.get('estado_actual', 'no_seguido')
         
         # Botón Seguir - habilitado solo si no lo sigues actualmente
-        seguir_enabled = estado_actual not in ['seguido', 'mutuo']
+        seguir_enabled = self.action_enabled("seguido", estado_actual)
         btn_seguir = ttk.Button(self.actions_frame, text="Seguir", 
                                command=lambda: self.add_event(username, "seguido"),
                                state='normal' if seguir_enabled else 'disabled')
         btn_seguir.pack(side=tk.LEFT, padx=(0, 10))
         
         # Botón Follow Back - habilitado solo si lo sigues pero él/ella no te sigue
-        follow_back_enabled = estado_actual == 'seguido'
+        follow_back_enabled = self.action_enabled("follow_back", estado_actual)
         btn_follow_back = ttk.Button(self.actions_frame, text="Follow Back", 
                                     command=lambda: self.add_event(username, "follow_back"),
                                     state='normal' if follow_back_enabled else 'disabled')
         btn_follow_back.pack(side=tk.LEFT, padx=(0, 10))
         
         # Botón Dejar de Seguir - habilitado si lo sigues actualmente (seguido o mutuo)
-        dejar_seguir_enabled = estado_actual in ['seguido', 'mutuo']
+        dejar_seguir_enabled = self.action_enabled("dejado_de_seguir", estado_actual)
         btn_dejar_seguir = ttk.Button(self.actions_frame, text="Dejar de Seguir", 
                                      command=lambda: self.add_event(username, "dejado_de_seguir"),
                                      state='normal' if dejar_seguir_enabled else 'disabled')
@@ -281,92 +717,158 @@ class FollowTracker:
         ttk.Button(self.actions_frame, text="Ver Historial", 
                   command=lambda: self.show_history(username)).pack(side=tk.LEFT, padx=(0, 10))
     
+    def action_enabled(self, event_type: str, estado_actual: str) -> bool:
+        """Si una acción tiene sentido en un estado (botones de acciones y acciones en lote)"""
+        if event_type == "seguido":
+            return estado_actual not in ['seguido', 'mutuo']
+        if event_type == "follow_back":
+            return estado_actual == 'seguido'
+        return estado_actual in ['seguido', 'mutuo']
+    
+    @perf.timed('add_event')
     def add_event(self, username: str, event_type: str):
         """Agregar un evento para un usuario"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # Buscar usuario existente
-        user_index = None
-        for i, user in enumerate(self.follows_data):
-            if user['username'] == username:
-                user_index = i
-                break
-        
-        if user_index is not None:
-            # Usuario existe, agregar evento
-            if 'eventos' not in self.follows_data[user_index]:
-                self.follows_data[user_index]['eventos'] = []
-            
-            self.follows_data[user_index]['eventos'].append({
-                'tipo': event_type,
-                'fecha': today
-            })
-            
-            # Actualizar fechas
-            if event_type == "seguido" and not self.follows_data[user_index].get('fecha_primer_seguimiento'):
-                self.follows_data[user_index]['fecha_primer_seguimiento'] = today
-            
-            self.follows_data[user_index]['fecha_ultima_interaccion'] = today
-            
-            # Actualizar estado
-            self.update_user_state(user_index)
-        else:
-            # Crear nuevo usuario
-            new_user = {
-                'username': username,
-                'eventos': [{'tipo': event_type, 'fecha': today}],
-                'fecha_primer_seguimiento': today if event_type == "seguido" else None,
-                'fecha_ultima_interaccion': today
-            }
-            self.follows_data.append(new_user)
-            self.update_user_state(len(self.follows_data) - 1)
-        
-        self.save_data()
-        self.refresh_table()
+        if self.loading:
+            return
+        
+        today = utils.get_current_date()
+        is_new = self.store.get_user(username) is None
+        # Aplicar y registrar juntos: un guardado en segundo plano no puede quedar en medio
+        with self.store.lock:
+            try:
+                self.store.apply_event(username, event_type, today)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar datos: {e}")
+                return
+            self.record_event(username, event_type, today)
+        
+        if is_new:
+            self.index_new_usernames([username])
+        self.refresh_table_row(username, is_new)
         self.update_statistics()
         self.search_user()  # Actualizar vista
     
-    def update_user_state(self, user_index: int):
-        """Actualizar el estado de un usuario basado en sus eventos"""
-        user = self.follows_data[user_index]
-        eventos = user.get('eventos', [])
+    def import_platform_export(self):
+        """Reconciliar los datos con las listas de seguidores y seguidos exportadas de la plataforma"""
+        if self.loading:
+            return
         
-        if not eventos:
-            user['estado_actual'] = 'no_seguido'
+        from tkinter import filedialog
+        filetypes = [("Exportación", "*.json *.csv *.txt"), ("Todos los archivos", "*.*")]
+        followers_file = filedialog.askopenfilename(title="Archivo de seguidores", filetypes=filetypes)
+        if not followers_file:
+            return
+        following_file = filedialog.askopenfilename(title="Archivo de seguidos", filetypes=filetypes)
+        if not following_file:
             return
         
-        # Obtener último evento
-        ultimo_evento = eventos[-1]['tipo']
+        try:
+            followers = utils.read_account_list(followers_file)
+            following = utils.read_account_list(following_file)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al leer la exportación: {e}")
+            return
         
-        if ultimo_evento == "seguido":
-            # Verificar si hay follow_back después del seguimiento
-            seguido_index = None
-            for i, evento in enumerate(eventos):
-                if evento['tipo'] == "seguido":
-                    seguido_index = i
-            
-            if seguido_index is not None:
-                # Buscar follow_back después del seguimiento
-                for evento in eventos[seguido_index:]:
-                    if evento['tipo'] == "follow_back":
-                        user['estado_actual'] = 'mutuo'
-                        return
-            
-            user['estado_actual'] = 'seguido'
-        elif ultimo_evento == "follow_back":
-            # Follow back significa que ambos se siguen mutuamente
-            user['estado_actual'] = 'mutuo'
-        elif ultimo_evento == "dejado_de_seguir":
-            # Si el último evento es "dejado_de_seguir", verificar el contexto
-            # Si venía de un estado mutuo, ahora él te sigue pero tú no lo sigues
-            if len(eventos) >= 2:
-                evento_anterior = eventos[-2]['tipo']
-                if evento_anterior == "follow_back":
-                    user['estado_actual'] = 'te_sigue'
-                else:
-                    user['estado_actual'] = 'seguido_previamente'
-            else:
-                user['estado_actual'] = 'seguido_previamente'
+        with self.store.lock:
+            try:
+                events = self.store.reconcile(followers, following, utils.get_current_date())
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar datos: {e}")
+                return
+            self.record_events(events)
+        self.index_new_usernames([username for username, _, _ in events])
+        # Los eventos cambian fechas y estados: con la tabla ordenada las filas cambian de posición
+        self.table_order_dirty = True
+        self.refresh_table()
+        self.update_statistics()
+        
+        resumen = {tipo: 0 for tipo in config.EVENT_TYPES}
+        for _, tipo, _ in events:
+            resumen[tipo] += 1
+        messagebox.showinfo("Importación", "Eventos registrados:\n\n" +
+                            "\n".join(f"• {tipo}: {total}" for tipo, total in resumen.items()))
+    
+    @perf.timed('bulk_action')
+    def bulk_action(self, event_type: str):
+        """
+        Registrar un evento para todas las cuentas seleccionadas en las que la
+        acción tiene sentido, en un solo lote: una transacción, una escritura
+        del journal y una actualización de la tabla y las estadísticas
+        """
+        if self.loading or self.tree is None:
+            return
+        
+        selected = self.get_selected_usernames()
+        if not selected:
+            messagebox.showinfo("Acciones en lote", "Selecciona una o más cuentas en la tabla")
+            return
+        usernames = []
+        for username in selected:
+            user = self.store.get_user(username)
+            if user is not None and self.action_enabled(event_type, user.get('estado_actual', 'no_seguido')):
+                usernames.append(username)
+        skipped = len(selected) - len(usernames)
+        if not usernames:
+            messagebox.showinfo("Acciones en lote",
+                                f"La acción no aplica a ninguna de las {len(selected)} cuentas seleccionadas")
+            return
+        message = f"¿Registrar '{event_type}' para {len(usernames)} cuentas?"
+        if skipped:
+            message += f"\n\n{skipped} cuentas seleccionadas se omitirán (la acción no aplica a su estado)"
+        if not messagebox.askyesno("Acciones en lote", message):
+            return
+        
+        today = utils.get_current_date()
+        events = [(username, event_type, today) for username in usernames]
+        # Aplicar y registrar juntos, igual que add_event
+        with self.store.lock:
+            try:
+                self.store.apply_events(events)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar datos: {e}")
+                return
+            self.record_events(events)
+        
+        self.clear_selection()
+        # Los eventos cambian fechas y estados: con la tabla ordenada las filas cambian de posición
+        self.table_order_dirty = True
+        self.refresh_table()
+        self.update_statistics()
+        if self.get_search_username() in set(usernames):
+            self.search_user()
+    
+    def get_selected_usernames(self) -> List[str]:
+        """Usernames seleccionados en la tabla (todas las filas filtradas con "Seleccionar todo")"""
+        if self.select_all_view:
+            return list(dict.fromkeys(user['username'] for user in self.view_rows))
+        # El iid de cada fila es el username
+        return list(self.tree.selection())
+    
+    def select_all_rows(self):
+        """Seleccionar todas las filas filtradas (en modo virtual, también las no visibles)"""
+        if self.tree is None:
+            return "break"
+        self.select_all_view = self.virtual_table
+        self.tree.selection_set(list(self.table_rows))
+        self.update_selection_label()
+        return "break"
+    
+    def clear_selection(self):
+        """Quitar la selección de la tabla"""
+        self.select_all_view = False
+        self.tree.selection_remove(*self.tree.selection())
+        self.update_selection_label()
+    
+    def on_tree_select(self, event=None):
+        """Cambió la selección de la tabla"""
+        # Un clic o una tecla cambian la selección completa de la ventana visible
+        if self.select_all_view and set(self.tree.selection()) != set(self.table_rows):
+            self.select_all_view = False
+        self.update_selection_label()
+    
+    def update_selection_label(self):
+        """Mostrar cuántas cuentas hay seleccionadas"""
+        self.selection_label.config(text=f"{len(self.get_selected_usernames())} seleccionados")
     
     def add_new_user(self, username: str):
         """Agregar un nuevo usuario"""
@@ -374,95 +876,381 @@ class FollowTracker:
     
     def show_history(self, username: str):
         """Mostrar historial de un usuario"""
-        for user in self.follows_data:
-            if user['username'] == username:
-                eventos = user.get('eventos', [])
-                if eventos:
-                    history_text = f"Historial de {username}:\n\n"
-                    for evento in eventos:
-                        history_text += f"• {evento['fecha']}: {evento['tipo']}\n"
-                    
-                    # Crear ventana de historial
-                    history_window = tk.Toplevel(self.root)
-                    history_window.title(f"Historial - {username}")
-                    history_window.geometry("400x300")
-                    
-                    text_widget = tk.Text(history_window, wrap=tk.WORD, padx=10, pady=10)
-                    text_widget.pack(fill=tk.BOTH, expand=True)
-                    text_widget.insert(tk.END, history_text)
-                    text_widget.config(state=tk.DISABLED)
-                else:
-                    messagebox.showinfo("Historial", f"No hay eventos registrados para {username}")
-                break
+        eventos = self.store.get_events(username)
+        if eventos:
+            history_text = f"Historial de {username}:\n\n"
+            for evento in eventos:
+                history_text += f"• {evento['fecha']}: {evento['tipo']}\n"
+            
+            # Crear ventana de historial
+            history_window = tk.Toplevel(self.root)
+            history_window.title(f"Historial - {username}")
+            history_window.geometry("400x300")
+            
+            text_widget = tk.Text(history_window, wrap=tk.WORD, padx=10, pady=10)
+            text_widget.pack(fill=tk.BOTH, expand=True)
+            text_widget.insert(tk.END, history_text)
+            text_widget.config(state=tk.DISABLED)
+        else:
+            messagebox.showinfo("Historial", f"No hay eventos registrados para {username}")
     
     def open_profile(self, username: str):
         """Abrir perfil en el navegador"""
-        # Remover @ si existe
-        clean_username = username[1:] if username.startswith('@') else username
-        url = f"https://instagram.com/{clean_username}"
-        webbrowser.open(url)
+        # Módulos poco usados: se importan en el primer uso para arrancar más rápido
+        import webbrowser
+        # La red de la cuenta activa (ver config.SOCIAL_NETWORKS)
+        webbrowser.open(utils.get_social_network_url(username, self.session.shard.network))
+    
+    def get_row_values(self, user: Dict) -> tuple:
+        """Valores de la fila de un usuario en la tabla"""
+        return (
+            user['username'],
+            user.get('estado_actual', 'N/A'),
+            user.get('fecha_primer_seguimiento', 'N/A'),
+            user.get('fecha_ultima_interaccion', 'N/A')
+        )
     
+    @perf.timed('refresh_table')
     def refresh_table(self):
-        """Actualizar la tabla de usuarios"""
-        # Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Aplicar filtro
-        filtered_data = self.filter_data()
-        
-        # Insertar datos
-        for user in filtered_data:
-            self.tree.insert('', tk.END, values=(
-                user['username'],
-                user.get('estado_actual', 'N/A'),
-                user.get('fecha_primer_seguimiento', 'N/A'),
-                user.get('fecha_ultima_interaccion', 'N/A')
-            ))
+        """Actualizar la tabla de usuarios aplicando sólo las diferencias"""
+        if self.tree is None:
+            # Todavía no se construyó (ver create_table)
+            return
+        self.view_rows = self.filter_data()
+        self.set_virtual_table(len(self.view_rows) >= config.VIRTUAL_TABLE_THRESHOLD)
+        
+        if self.virtual_table:
+            self.render_table_window()
+            return
+        
+        # Aplicar filtro (un username aparece una sola vez, es el iid de la fila)
+        visible = {}
+        for user in self.view_rows:
+            visible.setdefault(user['username'], user)
+        self.sync_table_rows(visible)
+    
+    def sync_table_rows(self, visible: Dict[str, Dict]):
+        """Dejar en la tabla exactamente las filas de visible, en ese orden"""
+        # Quitar filas que ya no pasan el filtro
+        stale = [username for username in self.table_rows if username not in visible]
+        if stale:
+            self.tree.delete(*stale)
+            for username in stale:
+                del self.table_rows[username]
+        
+        # Insertar filas nuevas y actualizar las que cambiaron
+        for position, (username, user) in enumerate(visible.items()):
+            values = self.get_row_values(user)
+            current = self.table_rows.get(username)
+            if current is None:
+                self.tree.insert('', position, iid=username, values=values)
+            elif current != values:
+                self.tree.item(username, values=values)
+            else:
+                continue
+            self.table_rows[username] = values
+        
+        # Reordenar en una sola llamada si se agregaron filas fuera de orden
+        if self.table_order_dirty:
+            self.tree.set_children('', *visible)
+            self.table_order_dirty = False
+    
+    def refresh_table_row(self, username: str, is_new: bool = False):
+        """Actualizar sólo la fila de un usuario (tras registrar un evento)"""
+        if self.tree is None:
+            return
+        if self.virtual_table or self.sort_column is not None:
+            # En modo virtual o con la tabla ordenada la fila puede cambiar de
+            # posición; se vuelve a calcular la vista (sin reordenar todo)
+            self.table_order_dirty = True
+            self.refresh_table()
+            return
+        
+        user = self.store.get_user(username)
+        filter_value = self.filter_var.get()
+        visible = user is not None and (filter_value == "todos" or
+                                        user.get('estado_actual') == filter_value)
+        
+        if not visible:
+            if username in self.table_rows:
+                self.tree.delete(username)
+                del self.table_rows[username]
+            return
+        
+        values = self.get_row_values(user)
+        current = self.table_rows.get(username)
+        if current is None:
+            self.tree.insert('', tk.END, iid=username, values=values)
+            # Sólo un usuario nuevo (el último registrado) queda en su posición
+            if not is_new:
+                self.table_order_dirty = True
+        elif current != values:
+            self.tree.item(username, values=values)
+        self.table_rows[username] = values
+    
+    def set_virtual_table(self, enabled: bool):
+        """Activar o desactivar el modo virtual de la tabla"""
+        if enabled == self.virtual_table:
+            return
+        
+        self.virtual_table = enabled
+        self.table_offset = 0
+        if enabled:
+            # La scrollbar pasa a mover la ventana de filas, no el Treeview
+            self.table_scrollbar.configure(command=self.on_table_scroll)
+            self.tree.configure(yscrollcommand='')
+        else:
+            self.table_scrollbar.configure(command=self.tree.yview)
+            self.tree.configure(yscrollcommand=self.table_scrollbar.set)
     
+    def get_table_page_size(self) -> int:
+        """Número de filas visibles de la tabla más un pequeño margen"""
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        visible_rows = max(int(self.tree.cget('height')), self.tree.winfo_height() // row_height)
+        return visible_rows + config.VIRTUAL_TABLE_BUFFER
+    
+    def render_table_window(self):
+        """Mostrar en modo virtual sólo las filas de la ventana visible"""
+        if not self.virtual_table:
+            return
+        
+        total = len(self.view_rows)
+        page_size = self.get_table_page_size()
+        self.table_offset = max(0, min(self.table_offset, total - page_size))
+        
+        visible = {}
+        for user in self.view_rows[self.table_offset:self.table_offset + page_size]:
+            visible.setdefault(user['username'], user)
+        self.sync_table_rows(visible)
+        if self.select_all_view:
+            # Las filas que entran en la ventana también están seleccionadas
+            self.tree.selection_set(list(self.table_rows))
+        
+        if total:
+            self.table_scrollbar.set(self.table_offset / total,
+                                     (self.table_offset + len(visible)) / total)
+        else:
+            self.table_scrollbar.set(0, 1)
+    
+    def scroll_table_to(self, offset: int):
+        """Mover la ventana virtual a la fila offset"""
+        if offset != self.table_offset:
+            self.table_offset = offset
+            self.render_table_window()
+    
+    def on_table_scroll(self, *args):
+        """Comando de la scrollbar en modo virtual (moveto / scroll)"""
+        if args[0] == 'moveto':
+            self.scroll_table_to(int(float(args[1]) * len(self.view_rows)))
+        elif args[0] == 'scroll':
+            step = self.get_table_page_size() if args[2] == 'pages' else 1
+            self.scroll_table_to(self.table_offset + int(args[1]) * step)
+    
+    def on_table_wheel(self, event):
+        """Rueda del ratón sobre la tabla en modo virtual"""
+        if not self.virtual_table:
+            return None
+        
+        if event.num == 4 or event.delta > 0:
+            self.scroll_table_to(max(0, self.table_offset - 3))
+        else:
+            self.scroll_table_to(self.table_offset + 3)
+        return "break"
+    
+    @perf.timed('filter_data')
     def filter_data(self):
         """Filtrar datos según el filtro seleccionado"""
-        filter_value = self.filter_var.get()
+        return self.store.filter_users(self.filter_var.get(), self.sort_column, self.sort_reverse)
+    
+    def sort_by_column(self, column: str):
+        """Ordenar la tabla por una columna; un segundo clic invierte el orden"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
         
-        if filter_value == "todos":
-            return self.follows_data
+        for name, title in self.column_titles.items():
+            if name == column:
+                title += " ▼" if self.sort_reverse else " ▲"
+            self.tree.heading(name, text=title)
         
-        return [user for user in self.follows_data 
-                if user.get('estado_actual') == filter_value]
+        self.table_order_dirty = True
+        self.table_offset = 0
+        # Durante la carga el orden se aplica en finish_background_load
+        if not self.loading:
+            self.refresh_table()
     
     def apply_filter(self, event=None):
         """Aplicar filtro a la tabla"""
+        self.table_offset = 0
+        self.select_all_view = False
+        # Durante la carga el filtro se aplica en finish_background_load
+        if not self.loading:
+            self.refresh_table()
+    
+    def reload_table(self):
+        """Botón "Actualizar": volver a leer la tabla desde los datos"""
+        if self.loading:
+            messagebox.showinfo("Cargando", "Los datos todavía se están cargando")
+            return
         self.refresh_table()
     
     def on_user_select(self, event):
         """Manejar selección de usuario en la tabla"""
         selection = self.tree.selection()
         if selection:
-            item = self.tree.item(selection[0])
-            username = item['values'][0]
+            # El iid de cada fila es el username
+            username = selection[0]
             self.search_var.set(username)
             self.search_user()
     
+    @perf.timed('update_statistics')
     def update_statistics(self):
         """Actualizar estadísticas"""
-        total_usuarios = len(self.follows_data)
-        seguidos_actualmente = len([u for u in self.follows_data if u.get('estado_actual') == 'seguido'])
-        te_siguen = len([u for u in self.follows_data if u.get('estado_actual') == 'te_sigue'])
-        relaciones_mutuas = len([u for u in self.follows_data if u.get('estado_actual') == 'mutuo'])
-        dejados_seguir = len([u for u in self.follows_data if u.get('estado_actual') == 'seguido_previamente'])
-        
-        # Calcular tasa de follow back
-        total_seguidos = seguidos_actualmente + relaciones_mutuas
-        tasa_follow_back = f"{(relaciones_mutuas / total_seguidos * 100):.1f}%" if total_seguidos > 0 else "0%"
+        # Los contadores por estado los mantiene el almacenamiento, no se recorren los datos
+        stats = utils.calculate_user_statistics(None, self.store.get_state_counts())
+        tasa_follow_back = utils.calculate_follow_back_rate(stats)
         
         # Actualizar labels
-        self.stats_labels['total_usuarios'].config(text=str(total_usuarios))
-        self.stats_labels['seguidos_actualmente'].config(text=str(seguidos_actualmente))
-        self.stats_labels['te_siguen'].config(text=str(te_siguen))
-        self.stats_labels['relaciones_mutuas'].config(text=str(relaciones_mutuas))
-        self.stats_labels['dejados_seguir'].config(text=str(dejados_seguir))
+        for key in ('total_usuarios', 'seguidos_actualmente', 'te_siguen',
+                    'relaciones_mutuas', 'dejados_seguir'):
+            self.stats_labels[key].config(text=str(stats[key]))
         self.stats_labels['tasa_follow_back'].config(text=tasa_follow_back)
     
+    def show_trends(self):
+        """Ventana con los eventos y la tasa de follow back por día, semana o mes"""
+        if self.loading:
+            messagebox.showinfo("Cargando", "Los datos todavía se están cargando")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Tendencias")
+        window.geometry("760x420")
+        
+        controls = ttk.Frame(window)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 5))
+        ttk.Label(controls, text="Agrupar por:").pack(side=tk.LEFT, padx=(0, 10))
+        labels = {label: period for period, label in timeseries.PERIOD_LABELS.items()}
+        period_var = tk.StringVar(value=timeseries.PERIOD_LABELS['mes'])
+        period_combo = ttk.Combobox(controls, textvariable=period_var, values=list(labels),
+                                    state="readonly", width=10)
+        period_combo.pack(side=tk.LEFT, padx=(0, 10))
+        
+        columns = ('seguido', 'follow_back', 'dejado_de_seguir', 'te_sigue',
+                   'tasa_follow_back', 'tasa_acumulada')
+        headings = ('Seguidos', 'Follow backs', 'Dejados de seguir', 'Te siguen',
+                    'Tasa follow back', 'Tasa acumulada')
+        frame = ttk.Frame(window)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        tree = ttk.Treeview(frame, columns=columns)
+        tree.heading('#0', text='Periodo')
+        tree.column('#0', width=100)
+        for column, text in zip(columns, headings):
+            tree.heading(column, text=text)
+            tree.column(column, width=100, anchor='e')
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        def refresh(event=None):
+            # Las series se mantienen con cada evento: sólo se arman las filas
+            rows = self.store.get_timeseries().rollup(labels[period_var.get()])
+            tree.delete(*tree.get_children())
+            for row in rows:
+                tree.insert('', tk.END, text=row['periodo'], values=(
+                    row['seguido'], row['follow_back'], row['dejado_de_seguir'], row['te_sigue'],
+                    timeseries.format_rate(row['tasa_follow_back']),
+                    timeseries.format_rate(row['tasa_acumulada'])))
+            # Los periodos más recientes al final, visibles
+            tree.yview_moveto(1.0)
+        
+        period_combo.bind('<<ComboboxSelected>>', refresh)
+        ttk.Button(controls, text="Actualizar", command=refresh).pack(side=tk.LEFT)
+        refresh()
+    
+    def show_performance_panel(self):
+        """Ventana "Rendimiento" con los percentiles de las rutas medidas (ver perf.py)"""
+        if self.perf_window is not None and self.perf_window.winfo_exists():
+            self.perf_window.lift()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Rendimiento")
+        window.geometry("700x400")
+        self.perf_window = window
+        
+        columns = ('calls', 'p50', 'p90', 'p99', 'max', 'total')
+        tree = ttk.Treeview(window, columns=columns)
+        tree.heading('#0', text='Ruta')
+        tree.column('#0', width=180)
+        for column, text in zip(columns, ('Llamadas', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)',
+                                          'Máx (ms)', 'Total (s)')):
+            tree.heading(column, text=text)
+            tree.column(column, width=80, anchor='e')
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        
+        counters_label = ttk.Label(window)
+        counters_label.pack(anchor=tk.W, padx=10)
+        
+        buttons = ttk.Frame(window)
+        buttons.pack(fill=tk.X, padx=10, pady=(5, 10))
+        ttk.Button(buttons, text="Exportar traza...",
+                   command=self.export_performance_trace).pack(side=tk.LEFT)
+        profile_button = ttk.Button(buttons, text="Exportar perfil...",
+                                    command=self.export_performance_profile)
+        profile_button.pack(side=tk.LEFT, padx=(5, 0))
+        if perf.profiler is None:
+            profile_button.config(state=tk.DISABLED)
+        
+        def refresh():
+            if not window.winfo_exists():
+                return
+            stats = perf.get_stats()
+            for name in tree.get_children():
+                if name not in stats:
+                    tree.delete(name)
+            for name in sorted(stats):
+                values = stats[name]
+                row = (values['calls'], *(f"{values[key] * 1000:.2f}" for key in ('p50', 'p90', 'p99', 'max')),
+                       f"{values['total']:.2f}")
+                if tree.exists(name):
+                    tree.item(name, values=row)
+                else:
+                    tree.insert('', tk.END, iid=name, text=name, values=row)
+            counters_label.config(text="  ".join(f"{name}: {value}"
+                                                 for name, value in sorted(perf.get_counters().items())))
+            window.after(1000, refresh)
+        
+        refresh()
+    
+    def export_performance_trace(self):
+        """Guardar la traza y los percentiles de la sesión como JSON"""
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(title="Exportar traza", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if path:
+            perf.dump_trace(path)
+    
+    def export_performance_profile(self):
+        """Guardar el perfil de cProfile de la sesión"""
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(title="Exportar perfil", defaultextension=".prof",
+                                            filetypes=[("cProfile", "*.prof")])
+        if path:
+            perf.dump_profile(path)
+    
+    def on_close(self):
+        """Cerrar la ventana sin perder los guardados pendientes y con un último backup de cada cuenta"""
+        shards.write_active(self.session.shard)
+        for session in self.sessions.values():
+            for error in session.close():
+                messagebox.showerror("Error", f"Error al cerrar {session.shard.label}: {error}")
+        
+        perf.dump_session()
+        self.root.destroy()
+    
     def run(self):
         """Ejecutar la aplicación"""
         self.root.mainloop()
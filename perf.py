@@ -0,0 +1,155 @@
+"""
+Mediciones de rendimiento de FollowTracker
+
+Se activa con config.PERF_ENABLED o con la variable de entorno
+FOLLOWTRACKER_PERF=1 (FOLLOWTRACKER_PERF=cprofile agrega cProfile). Si está
+desactivado, timed() retorna la función sin envolver y no cuesta nada.
+
+Cada ruta medida guarda sus últimas config.PERF_WINDOW duraciones (para los
+percentiles) y el total de llamadas; además se guarda una traza de la sesión
+que dump_trace() escribe en formato Chrome Trace (chrome://tracing, Perfetto).
+Con FOLLOWTRACKER_PERF_OUT=prefijo, dump_session() escribe al cerrar
+prefijo.json y, con cProfile, prefijo.prof.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import config
+
+MODE = os.environ.get('FOLLOWTRACKER_PERF', '').strip().lower()
+ENABLED = config.PERF_ENABLED or MODE not in ('', '0', 'false', 'no')
+SESSION_OUT = os.environ.get('FOLLOWTRACKER_PERF_OUT')
+
+lock = threading.Lock()
+# nombre -> últimas duraciones en segundos
+samples: Dict[str, deque] = {}
+# nombre -> llamadas / suma de duraciones / contadores de record_count
+calls: Dict[str, int] = {}
+totals: Dict[str, float] = {}
+counters: Dict[str, int] = {}
+# Traza de la sesión: (nombre, inicio, duración, hilo)
+trace: List[tuple] = []
+session_start = time.perf_counter()
+
+profiler = None
+if ENABLED and MODE == 'cprofile':
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+def record(name: str, seconds: float, start: float = None) -> None:
+    """Registrar una duración"""
+    with lock:
+        window = samples.get(name)
+        if window is None:
+            window = samples[name] = deque(maxlen=config.PERF_WINDOW)
+        window.append(seconds)
+        calls[name] = calls.get(name, 0) + 1
+        totals[name] = totals.get(name, 0.0) + seconds
+        if start is not None and len(trace) < config.PERF_TRACE_LIMIT:
+            trace.append((name, start, seconds, threading.get_ident()))
+
+def record_count(name: str, amount: int = 1) -> None:
+    """Sumar a un contador (no hace nada si las mediciones están desactivadas)"""
+    if ENABLED:
+        with lock:
+            counters[name] = counters.get(name, 0) + amount
+
+@contextmanager
+def measure(name: str):
+    """Medir un bloque: with perf.measure('nombre'): ..."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, start)
+
+def timed(name: str = None):
+    """
+    Decorador que mide cada llamada con el nombre dado (por defecto el de la función)
+    Desactivado, retorna la función original
+    """
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start, start)
+        return wrapper
+    return decorator
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por el método del rango más cercano"""
+    if not sorted_values:
+        return 0.0
+    position = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[position]
+
+def get_stats() -> Dict[str, Dict]:
+    """Llamadas, total y percentiles (en segundos) de la ventana de cada ruta"""
+    with lock:
+        windows = {name: sorted(window) for name, window in samples.items()}
+        stats = {}
+        for name, values in windows.items():
+            stats[name] = {
+                'calls': calls[name],
+                'total': totals[name],
+                'p50': percentile(values, 0.50),
+                'p90': percentile(values, 0.90),
+                'p99': percentile(values, 0.99),
+                'max': values[-1]
+            }
+    return stats
+
+def get_counters() -> Dict[str, int]:
+    """Copia de los contadores"""
+    with lock:
+        return dict(counters)
+
+def dump_trace(path: str) -> None:
+    """Escribir estadísticas, contadores y la traza de la sesión (Chrome Trace JSON)"""
+    with lock:
+        events = list(trace)
+    pid = os.getpid()
+    data = {
+        'traceEvents': [{'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                         'ts': (start - session_start) * 1e6, 'dur': seconds * 1e6}
+                        for name, start, seconds, tid in events],
+        'displayTimeUnit': 'ms',
+        'stats': get_stats(),
+        'counters': get_counters()
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False)
+
+def dump_profile(path: str) -> bool:
+    """Escribir el perfil de cProfile (para pstats/snakeviz); False si no está activo"""
+    if profiler is None:
+        return False
+    profiler.disable()
+    profiler.dump_stats(path)
+    profiler.enable()
+    return True
+
+def dump_session() -> Optional[str]:
+    """Volcar traza (y perfil) en FOLLOWTRACKER_PERF_OUT, si se definió"""
+    if not ENABLED or not SESSION_OUT:
+        return None
+    dump_trace(SESSION_OUT + '.json')
+    dump_profile(SESSION_OUT + '.prof')
+    return SESSION_OUT
@@ -0,0 +1,266 @@
+"""
+Representación compacta en memoria de los usuarios
+
+UserRecord guarda un usuario con __slots__, el estado y el username internados,
+las fechas como ordinales (date.toordinal) y los eventos en dos arrays
+paralelos (ordinal de la fecha, código del tipo). En los eventos, un ordinal
+negativo es una fecha que el YAML cargó como date (fecha sin comillas). Se comporta como el dict del
+YAML para las lecturas y escrituras que usa el resto del código (get, [],
+'eventos' como lista de dicts) y to_dict() reproduce exactamente el registro
+original.
+"""
+
+import sys
+from array import array
+from datetime import date
+from typing import Dict, List, Optional
+import config
+import utils
+
+# Códigos de tipo de evento (posición en la tupla)
+EVENT_CODES = tuple(config.EVENT_TYPES)
+EVENT_CODE_BY_TYPE = {tipo: code for code, tipo in enumerate(EVENT_CODES)}
+
+# Estados internados: todos los registros comparten el mismo objeto str
+STATES = {estado: sys.intern(estado) for estado in config.USER_STATES}
+
+DATE_FIELDS = ('fecha_primer_seguimiento', 'fecha_ultima_interaccion')
+
+class Missing:
+    """Marca de campo ausente en el registro original (distinto de None)"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+MISSING = Missing()
+
+def date_to_ordinal(value):
+    """
+    Ordinal de una fecha 'YYYY-MM-DD'; cualquier otro valor se conserva tal cual
+    """
+    if isinstance(value, str):
+        ordinal = utils.parse_date(value)
+        if ordinal is not None:
+            return ordinal
+    return value
+
+def ordinal_to_date(value):
+    """
+    Fecha 'YYYY-MM-DD' de un ordinal (los valores no enteros se retornan tal cual)
+    """
+    if type(value) is int:
+        return utils.ordinal_to_iso(value)
+    return value
+
+class EventList:
+    """
+    Vista de los eventos de un UserRecord como lista de {'tipo', 'fecha'}
+    """
+    __slots__ = ('record',)
+
+    def __init__(self, record: 'UserRecord'):
+        self.record = record
+
+    def __len__(self):
+        return len(self.record.event_codes)
+
+    def event_at(self, i: int) -> Dict:
+        ordinal = self.record.event_dates[i]
+        fecha = date.fromordinal(-ordinal) if ordinal < 0 else utils.ordinal_to_iso(ordinal)
+        return {'tipo': EVENT_CODES[self.record.event_codes[i]], 'fecha': fecha}
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.event_at(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('event index out of range')
+        return self.event_at(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.event_at(i)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def append(self, evento: Dict) -> None:
+        self.record.append_event(evento['tipo'], evento['fecha'])
+
+class UserRecord:
+    """
+    Usuario compacto compatible con el dict del YAML
+    Si algún evento no se puede codificar (tipo desconocido, fecha no ISO o
+    campos extra) los eventos se guardan sin comprimir en raw_events
+    """
+    __slots__ = ('username', 'estado_actual', 'fecha_primer_seguimiento',
+                 'fecha_ultima_interaccion', 'event_dates', 'event_codes',
+                 'raw_events', 'extra')
+
+    FIELDS = ('username', 'estado_actual', 'fecha_primer_seguimiento', 'fecha_ultima_interaccion')
+
+    def __init__(self, username: str):
+        self.username = sys.intern(username) if isinstance(username, str) else username
+        self.estado_actual = MISSING
+        self.fecha_primer_seguimiento = MISSING
+        self.fecha_ultima_interaccion = MISSING
+        self.event_dates = array('l')
+        self.event_codes = array('B')
+        # None si los eventos están en los arrays; lista de dicts si no se pudieron comprimir
+        self.raw_events: Optional[List[Dict]] = None
+        # Claves no reconocidas del registro original (None si no hay)
+        self.extra: Optional[Dict] = None
+
+    @classmethod
+    def from_dict(cls, user: Dict) -> 'UserRecord':
+        """Convertir un registro del YAML"""
+        record = cls(user['username'])
+        if 'eventos' not in user:
+            record.set_extra('eventos', MISSING)
+        for key, value in user.items():
+            if key != 'username':
+                record[key] = value
+        return record
+
+    def to_dict(self) -> Dict:
+        """Registro en el formato del YAML, igual al original"""
+        user = {'username': self.username}
+        eventos = self.get('eventos', MISSING)
+        if eventos is not MISSING:
+            user['eventos'] = list(eventos) if isinstance(eventos, (EventList, list)) else eventos
+        for field in self.FIELDS[1:]:
+            value = self.get_field(field)
+            if value is not MISSING:
+                user[field] = value
+        if self.extra:
+            user.update((k, v) for k, v in self.extra.items() if k != 'eventos')
+        return user
+
+    def get_field(self, field: str):
+        """Valor de un campo escalar (MISSING si no existe)"""
+        value = getattr(self, field)
+        if field in DATE_FIELDS:
+            return ordinal_to_date(value)
+        return value
+
+    def set_extra(self, key: str, value) -> None:
+        """Guardar un valor sin comprimir"""
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def set_events(self, eventos) -> None:
+        """Reemplazar todos los eventos, comprimiéndolos si es posible"""
+        self.event_dates = array('l')
+        self.event_codes = array('B')
+        self.raw_events = None
+        if self.extra:
+            self.extra.pop('eventos', None)
+        if isinstance(eventos, EventList):
+            eventos = list(eventos)
+        if not isinstance(eventos, list):
+            # Por ejemplo 'eventos: null' en el YAML
+            self.set_extra('eventos', eventos)
+            return
+        for evento in eventos:
+            if not self.encode_event(evento):
+                self.raw_events = list(eventos)
+                self.event_dates = array('l')
+                self.event_codes = array('B')
+                return
+
+    def encode_event(self, evento: Dict) -> bool:
+        """Agregar un evento a los arrays; False si no se puede comprimir sin pérdida"""
+        if not isinstance(evento, dict) or evento.keys() != {'tipo', 'fecha'}:
+            return False
+        code = EVENT_CODE_BY_TYPE.get(evento['tipo'])
+        fecha = evento['fecha']
+        if type(fecha) is date:
+            ordinal = -fecha.toordinal()
+        elif isinstance(fecha, str):
+            ordinal = date_to_ordinal(fecha)
+        else:
+            return False
+        if code is None or type(ordinal) is not int:
+            return False
+        self.event_codes.append(code)
+        self.event_dates.append(ordinal)
+        return True
+
+    def append_event(self, event_type: str, fecha: str) -> None:
+        """Agregar un evento al final del historial"""
+        evento = {'tipo': event_type, 'fecha': fecha}
+        if self.extra:
+            self.extra.pop('eventos', None)
+        if self.raw_events is not None:
+            self.raw_events.append(evento)
+        elif not self.encode_event(evento):
+            self.raw_events = list(EventList(self)) + [evento]
+            self.event_dates = array('l')
+            self.event_codes = array('B')
+
+    # Interfaz de dict usada por utils, sort_index y la tabla
+
+    def __getitem__(self, key: str):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default=None):
+        if key == 'eventos':
+            if self.raw_events is not None:
+                return self.raw_events
+            if self.extra and 'eventos' in self.extra:
+                # None ('eventos: null') o MISSING (sin clave 'eventos')
+                value = self.extra['eventos']
+                return default if value is MISSING else value
+            return EventList(self)
+        value = self.get_field(key) if key in self.FIELDS else MISSING
+        if value is MISSING and self.extra:
+            value = self.extra.get(key, MISSING)
+        return default if value is MISSING else value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def __setitem__(self, key: str, value) -> None:
+        if key == 'eventos':
+            self.set_events(value)
+        elif key == 'estado_actual':
+            self.estado_actual = STATES.get(value, value) if isinstance(value, str) else value
+        elif key in DATE_FIELDS and type(value) is not int:
+            setattr(self, key, date_to_ordinal(value))
+            if self.extra:
+                self.extra.pop(key, None)
+        elif key in DATE_FIELDS:
+            # Un entero original no se puede distinguir de un ordinal: se guarda aparte
+            setattr(self, key, MISSING)
+            self.set_extra(key, value)
+        elif key == 'username':
+            self.username = sys.intern(value) if isinstance(value, str) else value
+        else:
+            self.set_extra(key, value)
+
+    def setdefault(self, key: str, default=None):
+        if key not in self:
+            self[key] = default
+        return self.get(key)
+
+def compact_users(follows_data: List[Dict]) -> List[UserRecord]:
+    """
+    Convertir una lista de registros del YAML en UserRecord
+    """
+    return [user if isinstance(user, UserRecord) else UserRecord.from_dict(user)
+            for user in follows_data]
+
+def plain_users(follows_data: List) -> List[Dict]:
+    """
+    Convertir registros (compactos o no) al formato del YAML
+    """
+    return [user.to_dict() if isinstance(user, UserRecord) else user for user in follows_data]
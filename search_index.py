@@ -0,0 +1,119 @@
+"""
+Índice de usernames para las sugerencias de la búsqueda (type-ahead)
+
+Las búsquedas por prefijo usan una lista ordenada con bisect; las búsquedas
+aproximadas usan un índice de trigramas que se construye sólo si se habilita.
+Las comparaciones ignoran mayúsculas y la @ inicial.
+"""
+
+import bisect
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+def search_key(username: str) -> str:
+    """
+    Clave de búsqueda: sin @ inicial, en minúsculas
+    """
+    username = username.strip().lower()
+    return username[1:] if username.startswith('@') else username
+
+def trigrams(key: str) -> Set[str]:
+    """
+    Trigramas de una clave, con bordes para que cuenten el inicio y el final
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class UsernameSearchIndex:
+    """
+    Lista ordenada de (clave, username) más un índice opcional de trigramas
+    El índice de trigramas guarda posiciones en self.names para ocupar poco
+    """
+
+    def __init__(self, usernames: Iterable[str] = (), fuzzy: bool = True):
+        self.fuzzy = fuzzy
+        self.known: Set[str] = set()
+        self.names: List[str] = []
+        self.entries: List[Tuple[str, str]] = []
+        self.trigram_index: Dict[str, List[int]] = {}
+        self.add_many(usernames)
+
+    def add(self, username: str) -> None:
+        """Agregar un username nuevo"""
+        self.add_many([username])
+
+    def add_many(self, usernames: Iterable[str]) -> None:
+        """Agregar varios usernames de una vez (una sola mezcla de la lista ordenada)"""
+        new_entries = []
+        for name in usernames:
+            if name not in self.known:
+                self.known.add(name)
+                new_entries.append((search_key(name), name))
+
+        if len(new_entries) == 1:
+            bisect.insort(self.entries, new_entries[0])
+        elif new_entries:
+            # Timsort mezcla dos tramos ordenados en tiempo lineal
+            new_entries.sort()
+            self.entries.extend(new_entries)
+            self.entries.sort()
+
+        if self.fuzzy:
+            trigram_index = self.trigram_index
+            for key, name in new_entries:
+                position = len(self.names)
+                self.names.append(name)
+                for trigram in trigrams(key):
+                    postings = trigram_index.get(trigram)
+                    if postings is None:
+                        trigram_index[trigram] = [position]
+                    else:
+                        postings.append(position)
+
+    def prefix(self, query: str, limit: int = 10) -> List[str]:
+        """Usernames que empiezan por query, en orden alfabético"""
+        key = search_key(query)
+        if not key:
+            return []
+
+        results = []
+        position = bisect.bisect_left(self.entries, (key, ''))
+        while position < len(self.entries) and len(results) < limit:
+            entry_key, name = self.entries[position]
+            if not entry_key.startswith(key):
+                break
+            results.append(name)
+            position += 1
+        return results
+
+    def similar(self, query: str, limit: int = 10) -> List[str]:
+        """Usernames parecidos a query según los trigramas compartidos (Jaccard)"""
+        key = search_key(query)
+        if not self.fuzzy or len(key) < 2:
+            return []
+
+        query_trigrams = trigrams(key)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.trigram_index.get(trigram, ()))
+
+        # Sólo se puntúan los candidatos con más trigramas en común
+        scored = []
+        for position, count in shared.most_common(limit * 5):
+            name = self.names[position]
+            total = len(query_trigrams) + len(search_key(name)) + 1 - count
+            scored.append((count / total, name))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [name for score, name in scored[:limit] if score >= 0.3]
+
+    def suggest(self, query: str, limit: int = 10) -> List[str]:
+        """Sugerencias para query: primero por prefijo y luego aproximadas"""
+        results = self.prefix(query, limit)
+        if len(results) < limit:
+            seen = set(results)
+            for name in self.similar(query, limit):
+                if name not in seen:
+                    results.append(name)
+                    if len(results) == limit:
+                        break
+        return results
@@ -0,0 +1,242 @@
+"""
+Datos separados por cuenta y red social
+
+Además de los datos principales (config.DATA_FILE, JOURNAL_FILE y
+BACKUP_DIR), cada cuenta tiene su propio directorio:
+
+    cuentas/instagram/mi_cuenta/follows.yaml
+    cuentas/instagram/mi_cuenta/follows.journal
+    cuentas/instagram/mi_cuenta/backups/
+    cuentas/x/otra_cuenta/...
+
+Sólo se carga la cuenta seleccionada. Junto a los datos de cada cuenta se
+guarda un resumen (follows.resumen.json) con los contadores por estado, que
+se actualiza en cada guardado completo; el resumen de todas las cuentas se arma
+con esos archivos sin cargar ningún dato.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+import backups
+import config
+import storage
+import utils
+
+# Cuenta seleccionada en la última sesión
+ACTIVE_FILE = 'activa.json'
+
+class Shard:
+    """
+    Archivos de una cuenta de una red (account None: los datos principales)
+    """
+
+    def __init__(self, network: str, account: Optional[str] = None, data_file: str = None):
+        self.network = network
+        self.account = account
+        if account is None:
+            self.key = 'principal'
+            self.data_file = data_file or config.DATA_FILE
+            self.journal_file = storage.default_journal_file(self.data_file)
+            if storage.is_main_data_file(self.data_file):
+                self.backup_dir = config.BACKUP_DIR
+            else:
+                # Otro archivo de datos (cli.py --data): sus propios backups
+                self.backup_dir = os.path.splitext(self.data_file)[0] + '.backups'
+        else:
+            self.key = f"{network}/{account}"
+            directory = os.path.join(config.ACCOUNTS_DIR, network, account)
+            self.data_file = os.path.join(directory, os.path.basename(config.DATA_FILE))
+            self.journal_file = os.path.join(directory, os.path.basename(config.JOURNAL_FILE))
+            self.backup_dir = os.path.join(directory, os.path.basename(config.BACKUP_DIR))
+        self.stats_file = os.path.splitext(self.data_file)[0] + '.resumen.json'
+
+    @property
+    def label(self) -> str:
+        """Nombre para mostrar: red y cuenta"""
+        network = config.SOCIAL_NETWORKS.get(self.network, {})
+        name = f"{network.get('icon', '')} {network.get('name', self.network)}".strip()
+        if self.account is None:
+            return f"Principal ({name})"
+        return f"{name} · @{self.account}"
+
+    def open_store(self):
+        """Almacenamiento de la cuenta, sin cargar (ver storage.open_store)"""
+        return storage.open_store(self.data_file, self.journal_file)
+
+    def read_stats(self) -> Optional[Dict]:
+        """Resumen guardado de la cuenta (None si todavía no hay)"""
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def write_stats(self, state_counts: Dict[str, int]) -> None:
+        """Guardar el resumen de la cuenta (contadores por estado)"""
+        stats = {
+            'estados': state_counts,
+            'actualizado': datetime.now().isoformat(timespec='seconds')
+        }
+        tmp_file = self.stats_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as file:
+            json.dump(stats, file, ensure_ascii=False)
+        os.replace(tmp_file, self.stats_file)
+
+def principal(data_file: str = None) -> Shard:
+    """
+    Los datos principales (config.DATA_FILE), o un archivo de datos suelto con
+    su journal (<nombre>.journal) y sus backups (<nombre>.backups) al lado
+    """
+    return Shard(config.DEFAULT_NETWORK, None, data_file)
+
+def account_name(account: str) -> str:
+    """
+    Nombre del directorio de una cuenta (ValueError si no es un username válido)
+    Los puntos están permitidos en usernames, pero '.' o '..' saldrían de ACCOUNTS_DIR
+    """
+    account = account.strip()
+    valid, message = utils.validate_username(account)
+    if not valid:
+        raise ValueError(message)
+    name = utils.normalize_username(account)[1:]
+    if not name.strip('.'):
+        raise ValueError(f"Nombre de cuenta inválido: {account}")
+    return name
+
+def parse_key(key: str) -> Shard:
+    """
+    Cuenta existente de una clave 'red/cuenta' ('principal' para los datos principales)
+    ValueError si la clave no es válida o la cuenta no existe (ver create_account)
+    """
+    if key == 'principal':
+        return principal()
+    network, _, account = key.partition('/')
+    if network not in config.SOCIAL_NETWORKS or not account:
+        raise ValueError(f"Cuenta inválida: {key} (se espera red/cuenta, p. ej. instagram/mi_cuenta)")
+    shard = Shard(network, account_name(account))
+    if not os.path.isdir(os.path.dirname(shard.data_file)):
+        raise ValueError(f"No existe la cuenta {shard.key} (créala con Nueva... en la interfaz)")
+    return shard
+
+def create_account(network: str, account: str) -> Shard:
+    """Crear el directorio de una cuenta nueva (ValueError si el nombre no es válido)"""
+    if network not in config.SOCIAL_NETWORKS:
+        raise ValueError(f"Red social desconocida: {network}")
+    shard = Shard(network, account_name(account))
+    os.makedirs(os.path.dirname(shard.data_file), exist_ok=True)
+    return shard
+
+def list_shards() -> List[Shard]:
+    """Los datos principales y las cuentas de ACCOUNTS_DIR, sin cargar nada"""
+    shards = [principal()]
+    for network in config.SOCIAL_NETWORKS:
+        network_dir = os.path.join(config.ACCOUNTS_DIR, network)
+        if not os.path.isdir(network_dir):
+            continue
+        for account in sorted(os.listdir(network_dir)):
+            if os.path.isdir(os.path.join(network_dir, account)):
+                shards.append(Shard(network, account))
+    return shards
+
+def read_active() -> Shard:
+    """Cuenta seleccionada en la última sesión (los datos principales si no hay)"""
+    try:
+        with open(os.path.join(config.ACCOUNTS_DIR, ACTIVE_FILE), 'r', encoding='utf-8') as file:
+            return parse_key(json.load(file)['cuenta'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return principal()
+
+def write_active(shard: Shard) -> None:
+    """Recordar la cuenta seleccionada"""
+    if shard.account is None and not os.path.isdir(config.ACCOUNTS_DIR):
+        return
+    os.makedirs(config.ACCOUNTS_DIR, exist_ok=True)
+    with open(os.path.join(config.ACCOUNTS_DIR, ACTIVE_FILE), 'w', encoding='utf-8') as file:
+        json.dump({'cuenta': shard.key}, file)
+
+def summarize(shards: List[Shard], live_counts: Dict[str, Dict[str, int]] = None) -> Dict:
+    """
+    Resumen de varias cuentas desde sus resúmenes guardados
+    live_counts (clave -> contadores por estado) tiene prioridad para las
+    cuentas cargadas. Retorna {'cuentas': [(cuenta, estadísticas o None,
+    actualizado)], 'total': estadísticas sumadas}
+    """
+    live_counts = live_counts or {}
+    rows = []
+    totals = dict.fromkeys(config.USER_STATES, 0)
+    for shard in shards:
+        if shard.key in live_counts:
+            state_counts = live_counts[shard.key]
+            updated = 'ahora'
+        else:
+            cached = shard.read_stats()
+            state_counts = cached['estados'] if cached else None
+            updated = cached.get('actualizado') if cached else None
+        if state_counts is None:
+            rows.append((shard, None, None))
+            continue
+        for estado, count in state_counts.items():
+            totals[estado] = totals.get(estado, 0) + count
+        rows.append((shard, utils.calculate_user_statistics(None, state_counts), updated))
+    return {'cuentas': rows, 'total': utils.calculate_user_statistics(None, totals)}
+
+class ShardSession:
+    """
+    Una cuenta abierta: su almacenamiento con los guardados y backups en
+    segundo plano (si background) y el resumen que se actualiza al guardar
+    """
+
+    def __init__(self, shard: Shard, background: bool = True):
+        self.shard = shard
+        self.store = shard.open_store()
+        self.loaded = False
+        self.saver = None
+        if background and self.store.write_behind:
+            self.saver = storage.WriteBehindSaver(self.save, config.SAVE_DELAY_MS / 1000)
+        self.backups = None
+        self.backup_saver = None
+        if background and config.BACKUP_INTERVAL_MIN > 0:
+            self.backups = backups.BackupManager(shard.backup_dir)
+            self.backup_saver = storage.WriteBehindSaver(lambda: self.backups.backup(self.store), 0)
+
+    def load(self) -> None:
+        """Cargar los datos (puede ejecutarse en un hilo de trabajo)"""
+        self.store.load()
+        self.loaded = True
+
+    def save(self) -> None:
+        """Guardado completo y resumen actualizado"""
+        self.store.save()
+        self.write_stats()
+
+    def write_stats(self) -> None:
+        """Guardar el resumen de la cuenta con los contadores actuales"""
+        with self.store.lock:
+            state_counts = self.store.get_state_counts()
+        self.shard.write_stats(state_counts)
+
+    def close(self) -> List[Exception]:
+        """
+        Terminar los guardados pendientes, hacer el último backup y guardar el
+        resumen; retorna los errores para mostrarlos
+        """
+        errors = []
+        for saver in (self.saver, self.backup_saver):
+            if saver is not None:
+                saver.close()
+        if self.backups is not None and self.loaded:
+            try:
+                self.backups.close(self.store)
+            except Exception as e:
+                errors.append(e)
+        if self.loaded:
+            try:
+                self.write_stats()
+            except OSError as e:
+                errors.append(e)
+        for saver in (self.saver, self.backup_saver):
+            while saver is not None and not saver.errors.empty():
+                errors.append(saver.errors.get_nowait())
+        return errors
@@ -0,0 +1,72 @@
+"""
+Órdenes precalculados de usuarios para ordenar la tabla por columna
+
+Cada columna guarda una lista ordenada de (clave, username). La lista se
+construye la primera vez que se pide y después se mantiene con bisect en cada
+evento, así que reordenar no vuelve a ordenar todos los usuarios.
+"""
+
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+# Columna de la tabla -> campo del registro de usuario
+SORT_FIELDS = {
+    'username': 'username',
+    'estado': 'estado_actual',
+    'fecha_primer_seguimiento': 'fecha_primer_seguimiento',
+    'fecha_ultima_interaccion': 'fecha_ultima_interaccion'
+}
+
+def sort_key(user: Dict, field: str) -> str:
+    """
+    Clave de orden de un campo (los valores vacíos van primero)
+    """
+    value = user.get(field)
+    return '' if value is None else str(value)
+
+class UserSortIndex:
+    """
+    Órdenes por columna sobre un índice username -> usuario
+    """
+
+    def __init__(self, user_index: Dict[str, Dict]):
+        self.user_index = user_index
+        self.orders: Dict[str, List[Tuple[str, str]]] = {}
+
+    def get_order(self, column: str) -> List[Tuple[str, str]]:
+        """Lista ordenada de una columna (se construye en el primer uso)"""
+        order = self.orders.get(column)
+        if order is None:
+            field = SORT_FIELDS[column]
+            order = sorted((sort_key(user, field), username)
+                           for username, user in self.user_index.items())
+            self.orders[column] = order
+        return order
+
+    def get_keys(self, user: Dict) -> Dict[str, str]:
+        """Claves actuales de un usuario en los órdenes ya construidos"""
+        return {column: sort_key(user, SORT_FIELDS[column]) for column in self.orders}
+
+    def update(self, user: Dict, old_keys: Optional[Dict[str, str]]) -> None:
+        """
+        Reubicar un usuario tras un cambio (old_keys de get_keys, None si es nuevo)
+        O(log n) para encontrar la posición más el desplazamiento de la lista
+        """
+        username = user['username']
+        for column, order in self.orders.items():
+            new_key = sort_key(user, SORT_FIELDS[column])
+            if old_keys is not None:
+                old_key = old_keys.get(column)
+                if old_key == new_key:
+                    continue
+                position = bisect.bisect_left(order, (old_key, username))
+                if position < len(order) and order[position] == (old_key, username):
+                    del order[position]
+            bisect.insort(order, (new_key, username))
+
+    def ordered_usernames(self, column: str, reverse: bool = False) -> List[str]:
+        """Usernames ordenados por una columna"""
+        order = self.get_order(column)
+        if reverse:
+            return [username for _, username in reversed(order)]
+        return [username for _, username in order]
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Backend SQLite para FollowTracker
+
+Usuarios y eventos viven en tablas indexadas (username, estado_actual,
+fecha_ultima_interaccion), así que búsquedas, filtros, estadísticas e
+historial son consultas en lugar de recorridos de la lista en memoria, y cada
+evento es una inserción en una transacción.
+
+Se activa con un DATA_FILE terminado en .db/.sqlite/.sqlite3 en config.py.
+Para migrar un follows.yaml existente:
+
+    python sqlite_store.py follows.yaml follows.db
+"""
+
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import config
+import perf
+import sort_index
+import storage
+import timeseries
+import utils
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    estado_actual TEXT NOT NULL DEFAULT 'no_seguido',
+    fecha_primer_seguimiento TEXT,
+    fecha_ultima_interaccion TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_estado ON users (estado_actual);
+CREATE INDEX IF NOT EXISTS idx_users_ultima_interaccion ON users (fecha_ultima_interaccion);
+CREATE INDEX IF NOT EXISTS idx_users_primer_seguimiento ON users (fecha_primer_seguimiento);
+
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    tipo TEXT NOT NULL,
+    fecha TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_eventos_user ON eventos (user_id);
+"""
+
+USER_COLUMNS = ('username', 'estado_actual', 'fecha_primer_seguimiento', 'fecha_ultima_interaccion')
+
+class SQLiteStore:
+    """
+    Almacenamiento en SQLite con la misma interfaz que storage.YamlStore
+    Los registros de usuario que retorna no incluyen 'eventos' (ver get_events)
+    """
+
+    # Cada evento ya se confirma en su transacción; no hay guardados completos que diferir
+    write_behind = False
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self.conn = None
+        # Mismo contrato que YamlStore.lock: aplicar y registrar un evento es atómico
+        self.lock = threading.RLock()
+        # Series temporales de eventos: se consultan en el primer get_timeseries()
+        self.timeseries = None
+
+    @perf.timed('load_data')
+    def load(self) -> None:
+        """Abrir la base de datos y crear el esquema si no existe"""
+        # La carga ocurre en un hilo de trabajo; después sólo se usa desde el hilo de la UI
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def set_data(self, follows_data: Iterable[Dict]) -> None:
+        """
+        Reemplazar todos los usuarios y eventos (restauración, migración o
+        importación) en una transacción; follows_data se recorre una sola vez
+        """
+        self.timeseries = None
+        with self.conn:
+            self.conn.execute("DELETE FROM eventos")
+            self.conn.execute("DELETE FROM users")
+            for user in follows_data:
+                # Igual que el índice en memoria, si un username se repite vale el primero
+                primer_seguimiento = user.get('fecha_primer_seguimiento')
+                ultima_interaccion = user.get('fecha_ultima_interaccion')
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO users (username, estado_actual, fecha_primer_seguimiento, "
+                    "fecha_ultima_interaccion) VALUES (?, ?, ?, ?)",
+                    (user['username'], user.get('estado_actual', 'no_seguido'),
+                     str(primer_seguimiento) if primer_seguimiento else None,
+                     str(ultima_interaccion) if ultima_interaccion else None)
+                )
+                if not cursor.rowcount:
+                    continue
+                self.conn.executemany(
+                    "INSERT INTO eventos (user_id, tipo, fecha) VALUES (?, ?, ?)",
+                    ((cursor.lastrowid, evento['tipo'], str(evento['fecha']))
+                     for evento in user.get('eventos') or [])
+                )
+
+    @perf.timed('save_data')
+    def save(self) -> None:
+        """Cada evento ya se confirma en su propia transacción"""
+        self.conn.commit()
+
+    def record_events(self, events: List[Tuple[str, str, str]]) -> bool:
+        """Los eventos quedan persistidos al aplicarlos; nunca hace falta un guardado completo"""
+        return False
+
+    def row_to_user(self, row) -> Dict:
+        """Convertir una fila de users en un registro como los del YAML"""
+        return dict(zip(USER_COLUMNS, row))
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        """Registro de un usuario (sin eventos) o None"""
+        row = self.conn.execute(
+            f"SELECT {', '.join(USER_COLUMNS)} FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        return self.row_to_user(row) if row else None
+
+    def get_events(self, username: str) -> List[Dict]:
+        """Eventos de un usuario en orden cronológico"""
+        rows = self.conn.execute(
+            "SELECT e.tipo, e.fecha FROM eventos e JOIN users u ON u.id = e.user_id "
+            "WHERE u.username = ? ORDER BY e.id", (username,)
+        ).fetchall()
+        return [{'tipo': tipo, 'fecha': fecha} for tipo, fecha in rows]
+
+    def write_event(self, username: str, event_type: str, fecha: str) -> Dict:
+        """Insertar un evento y actualizar el usuario (dentro de una transacción abierta)"""
+        perf.record_count('eventos_aplicados')
+        row = self.conn.execute(
+            "SELECT id, estado_actual, fecha_primer_seguimiento FROM users WHERE username = ?",
+            (username,)
+        ).fetchone()
+
+        if row is None:
+            estado = utils.transition_state('no_seguido', event_type)
+            primer_seguimiento = fecha if event_type == "seguido" else None
+            user_id = self.conn.execute(
+                "INSERT INTO users (username, estado_actual, fecha_primer_seguimiento, "
+                "fecha_ultima_interaccion) VALUES (?, ?, ?, ?)",
+                (username, estado, primer_seguimiento, fecha)
+            ).lastrowid
+        else:
+            user_id, estado, primer_seguimiento = row
+            estado = utils.transition_state(estado, event_type)
+            if event_type == "seguido" and not primer_seguimiento:
+                primer_seguimiento = fecha
+            self.conn.execute(
+                "UPDATE users SET estado_actual = ?, fecha_primer_seguimiento = ?, "
+                "fecha_ultima_interaccion = ? WHERE id = ?",
+                (estado, primer_seguimiento, fecha, user_id)
+            )
+
+        self.conn.execute("INSERT INTO eventos (user_id, tipo, fecha) VALUES (?, ?, ?)",
+                          (user_id, event_type, fecha))
+        if self.timeseries is not None:
+            self.timeseries.add(event_type, fecha)
+        return {'username': username, 'estado_actual': estado,
+                'fecha_primer_seguimiento': primer_seguimiento, 'fecha_ultima_interaccion': fecha}
+
+    def apply_event(self, username: str, event_type: str, fecha: str) -> Dict:
+        """Registrar un evento en una transacción"""
+        with self.conn:
+            return self.write_event(username, event_type, fecha)
+
+    def apply_events(self, events: Iterable[Tuple[str, str, str]]) -> int:
+        """Registrar un lote de eventos (username, tipo, fecha) en una sola transacción"""
+        total = 0
+        with self.conn:
+            for username, event_type, fecha in events:
+                self.write_event(username, event_type, fecha)
+                total += 1
+        return total
+
+    def reconcile(self, followers: Set[str], following: Set[str],
+                  fecha: str) -> List[Tuple[str, str, str]]:
+        """Reconciliar con las listas de seguidores y seguidos en una transacción"""
+        stored = utils.stored_username_map(self.usernames())
+        followers = utils.match_stored_usernames(followers, stored)
+        following = utils.match_stored_usernames(following, stored)
+        # Estados de las cuentas de las listas y de las que sigues actualmente
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS candidatos (username TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM candidatos")
+        self.conn.executemany("INSERT OR IGNORE INTO candidatos VALUES (?)",
+                              ((username,) for username in following | followers))
+        states = dict(self.conn.execute(
+            "SELECT u.username, u.estado_actual FROM candidatos c "
+            "JOIN users u ON u.username = c.username"
+        ))
+        states.update(self.conn.execute(
+            "SELECT username, estado_actual FROM users WHERE estado_actual IN ('seguido', 'mutuo')"
+        ))
+
+        events = []
+        with self.conn:
+            for username, tipo in utils.plan_reconcile(states, followers, following):
+                self.write_event(username, tipo, fecha)
+                events.append((username, tipo, fecha))
+        return events
+
+    def filter_users(self, estado: str = "todos", sort_by: str = None,
+                     reverse: bool = False) -> List[Dict]:
+        """
+        Usuarios con un estado_actual dado ('todos' para todos), sin eventos
+        sort_by es una columna de sort_index.SORT_FIELDS (ORDER BY sobre su índice)
+        """
+        query = f"SELECT {', '.join(USER_COLUMNS)} FROM users"
+        params = ()
+        if estado != "todos":
+            query += " WHERE estado_actual = ?"
+            params = (estado,)
+        
+        if sort_by is None:
+            query += " ORDER BY id"
+        else:
+            direction = "DESC" if reverse else "ASC"
+            field = sort_index.SORT_FIELDS[sort_by]
+            # NULL ordena primero, igual que la clave vacía de sort_index
+            query += f" ORDER BY {field} {direction}, username {direction}"
+        return [self.row_to_user(row) for row in self.conn.execute(query, params)]
+
+    def all_users(self) -> List[Dict]:
+        """Todos los usuarios con sus eventos, en el formato del YAML"""
+        events = {}
+        for user_id, tipo, fecha in self.conn.execute("SELECT user_id, tipo, fecha FROM eventos ORDER BY id"):
+            events.setdefault(user_id, []).append({'tipo': tipo, 'fecha': fecha})
+
+        follows_data = []
+        for row in self.conn.execute(f"SELECT id, {', '.join(USER_COLUMNS)} FROM users ORDER BY id"):
+            user = self.row_to_user(row[1:])
+            user['eventos'] = events.get(row[0], [])
+            follows_data.append(user)
+        return follows_data
+
+    def snapshot_users(self) -> List[Dict]:
+        """Todos los usuarios leídos con una conexión propia (para usar desde otro hilo)"""
+        reader = SQLiteStore(self.db_file)
+        reader.conn = sqlite3.connect(self.db_file)
+        try:
+            return reader.all_users()
+        finally:
+            reader.conn.close()
+
+    def begin_snapshot(self) -> storage.UserSnapshot:
+        """Los usuarios en este instante; se leen ya, con una conexión propia"""
+        return storage.UserSnapshot(self.snapshot_users())
+
+    def iter_users(self) -> Iterator[Dict]:
+        """Usuarios con sus eventos, uno a la vez, leyendo del cursor sin cargar la tabla"""
+        query = (f"SELECT u.id, {', '.join('u.' + column for column in USER_COLUMNS)}, e.tipo, e.fecha "
+                 "FROM users u LEFT JOIN eventos e ON e.user_id = u.id ORDER BY u.id, e.id")
+        user = None
+        user_id = None
+        for row in self.conn.execute(query):
+            if row[0] != user_id:
+                if user is not None:
+                    yield user
+                user_id = row[0]
+                user = self.row_to_user(row[1:5])
+                user['eventos'] = []
+            if row[5] is not None:
+                user['eventos'].append({'tipo': row[5], 'fecha': row[6]})
+        if user is not None:
+            yield user
+
+    def usernames(self) -> List[str]:
+        """Todos los usernames registrados"""
+        return [row[0] for row in self.conn.execute("SELECT username FROM users")]
+
+    def total_users(self) -> int:
+        """Número de usuarios registrados"""
+        return self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get_state_counts(self) -> Dict[str, int]:
+        """Usuarios por estado (consulta sobre el índice de estado_actual)"""
+        counts = dict.fromkeys(config.USER_STATES, 0)
+        counts.update(self.conn.execute(
+            "SELECT estado_actual, COUNT(*) FROM users GROUP BY estado_actual"
+        ))
+        return counts
+
+    def verify_state_counts(self) -> bool:
+        """Los contadores se consultan directamente, siempre coinciden"""
+        return True
+
+    def get_timeseries(self) -> timeseries.EventTimeSeries:
+        """Eventos por día, semana y mes (agrupados por SQLite una vez y luego mantenidos)"""
+        with self.lock:
+            if self.timeseries is None:
+                self.timeseries = timeseries.EventTimeSeries.from_counts(self.conn.execute(
+                    "SELECT fecha, tipo, COUNT(*) FROM eventos GROUP BY fecha, tipo"
+                ))
+            return self.timeseries
+
+def migrate_yaml_to_sqlite(yaml_file: str, db_file: str, journal_file: str = None) -> int:
+    """
+    Migrar un follows.yaml (y su journal, si se indica) a una base SQLite
+    Retorna el número de usuarios migrados
+    """
+    journal = storage.EventJournal(journal_file) if journal_file else None
+    follows_data = storage.load_data(yaml_file, journal)
+
+    store = SQLiteStore(db_file)
+    store.load()
+    store.set_data(follows_data)
+    total = store.total_users()
+    store.conn.close()
+    return total
+
+def main():
+    """Migración desde la línea de comandos"""
+    if len(sys.argv) < 3:
+        print("Uso: python sqlite_store.py follows.yaml follows.db [follows.journal]")
+        sys.exit(1)
+
+    total = migrate_yaml_to_sqlite(*sys.argv[1:4])
+    print(f"✓ {total} usuarios migrados a {sys.argv[2]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,600 @@
+"""
+Persistencia de datos para FollowTracker
+
+Los datos se guardan como un snapshot YAML (follows.yaml) más un journal
+append-only con los eventos registrados desde el último snapshot. Registrar
+un evento sólo agrega una línea al journal; cada cierto número de eventos el
+journal se compacta en el snapshot.
+
+YamlStore y sqlite_store.SQLiteStore exponen la misma interfaz; open_store
+elige uno según config.DATA_FILE. WriteBehindSaver agrupa los guardados
+completos y los hace en un hilo aparte.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import config
+import perf
+import records
+import sort_index
+import timeseries
+import utils
+
+# Extensiones de DATA_FILE que seleccionan el backend SQLite
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+# PyYAML se importa en el primer uso (normalmente en el hilo de carga), así la
+# ventana no espera a importarlo: (módulo yaml, Loader, Dumper, backend)
+YAML = None
+
+def get_yaml():
+    """
+    PyYAML con el Loader y Dumper más rápidos disponibles
+    Usa LibYAML (extensión en C) si está disponible; es mucho más rápida que la
+    implementación en Python puro para archivos grandes
+    """
+    global YAML
+    if YAML is None:
+        import yaml
+        try:
+            from yaml import CSafeLoader as loader, CSafeDumper as dumper
+            backend = 'libyaml'
+        except ImportError:
+            from yaml import SafeLoader as loader, SafeDumper as dumper
+            backend = 'python'
+        YAML = (yaml, loader, dumper, backend)
+    return YAML
+
+def get_yaml_backend() -> str:
+    """
+    Backend YAML activo: 'libyaml' o 'python'
+    """
+    return get_yaml()[3]
+
+def yaml_load(stream):
+    """
+    Deserializar YAML con el backend más rápido disponible
+    """
+    yaml, loader, _, _ = get_yaml()
+    return yaml.load(stream, Loader=loader)
+
+def yaml_dump(data, stream) -> None:
+    """
+    Serializar YAML con el backend más rápido disponible
+    """
+    yaml, _, dumper, _ = get_yaml()
+    yaml.dump(data, stream, Dumper=dumper, default_flow_style=False, allow_unicode=True)
+
+# Primera línea del snapshot: el último evento del journal que ya incluye
+# (un comentario YAML, así el archivo sigue siendo una lista de usuarios)
+JOURNAL_SEQ_HEADER = '# journal_seq: '
+
+def load_snapshot(data_file: str) -> List[Dict]:
+    """
+    Cargar el snapshot YAML (lista vacía si no existe)
+    """
+    if not os.path.exists(data_file):
+        return []
+    with open(data_file, 'r', encoding='utf-8') as file:
+        return yaml_load(file) or []
+
+def snapshot_journal_seq(data_file: str) -> int:
+    """
+    Número del último evento del journal incluido en el snapshot (0 si no hay
+    snapshot o no lo indica, p. ej. guardado por una versión anterior)
+    """
+    try:
+        with open(data_file, 'r', encoding='utf-8') as file:
+            line = file.readline()
+    except OSError:
+        return 0
+    if not line.startswith(JOURNAL_SEQ_HEADER):
+        return 0
+    try:
+        return int(line[len(JOURNAL_SEQ_HEADER):])
+    except ValueError:
+        return 0
+
+def fsync_directory(path: str) -> None:
+    """
+    Sincronizar el directorio de path para que un rename sobreviva a un corte
+    (no existe en Windows, donde basta con el fsync del archivo)
+    """
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def save_snapshot(data_file: str, follows_data: List[Dict], journal_seq: int = 0) -> None:
+    """
+    Guardar el snapshot YAML completo de forma atómica
+    Se escribe a un archivo temporal, se sincroniza a disco (fsync) y luego
+    reemplaza al original, así un corte a mitad nunca deja el archivo a medias.
+    journal_seq: último evento del journal que incluye (ver load_data)
+    """
+    tmp_file = data_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        if journal_seq:
+            file.write(f"{JOURNAL_SEQ_HEADER}{journal_seq}\n")
+        yaml_dump(follows_data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file, data_file)
+    fsync_directory(data_file)
+
+class EventJournal:
+    """
+    Journal append-only de eventos (una línea JSON por evento)
+    Cada evento lleva un número creciente ('seq'); el snapshot guarda el
+    último que incluye, así los que quedan en el journal si se corta entre
+    guardar el snapshot y descartarlos no se reproducen dos veces
+    """
+
+    def __init__(self, journal_file: str):
+        self.journal_file = journal_file
+        # Eventos en el journal aún no compactados en el snapshot
+        self.pending = 0
+        # Número del último evento escrito
+        self.seq = 0
+
+    def append(self, username: str, event_type: str, fecha: str) -> None:
+        """Agregar un evento al final del journal"""
+        self.extend([(username, event_type, fecha)])
+
+    def extend(self, events: List[Tuple[str, str, str]]) -> None:
+        """Agregar un lote de eventos (username, tipo, fecha) con una sola escritura"""
+        lines = [json.dumps({'username': username, 'tipo': event_type, 'fecha': fecha,
+                             'seq': seq},
+                            ensure_ascii=False) + '\n'
+                 for seq, (username, event_type, fecha) in enumerate(events, self.seq + 1)]
+        with open(self.journal_file, 'a', encoding='utf-8') as file:
+            file.write(''.join(lines))
+        self.pending += len(lines)
+        self.seq += len(lines)
+
+    def read(self) -> Iterator[Dict]:
+        """
+        Leer los eventos del journal en orden
+        Las líneas incompletas o corruptas (p. ej. por un cierre abrupto) se ignoran
+        """
+        self.pending = 0
+        self.seq = 0
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.pending += 1
+                if isinstance(entry.get('seq'), int):
+                    self.seq = max(self.seq, entry['seq'])
+                yield entry
+
+    def clear(self) -> None:
+        """Vaciar el journal (después de compactarlo en el snapshot)"""
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self.pending = 0
+
+    def mark(self) -> Tuple[int, int, int]:
+        """Posición actual del journal: (bytes, eventos pendientes, último seq)"""
+        size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        return size, self.pending, self.seq
+
+    def discard_before(self, position: Tuple[int, int, int]) -> None:
+        """
+        Descartar los eventos anteriores a una posición de mark() (ya incluidos
+        en un snapshot), conservando los que se agregaron después
+        """
+        size, pending, _ = position
+        if not os.path.exists(self.journal_file):
+            self.pending = 0
+            return
+        with open(self.journal_file, 'rb') as file:
+            file.seek(size)
+            tail = file.read()
+        if not tail:
+            self.clear()
+            return
+        tmp_file = self.journal_file + '.tmp'
+        with open(tmp_file, 'wb') as file:
+            file.write(tail)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, self.journal_file)
+        self.pending = max(self.pending - pending, 0)
+
+@perf.timed('load_data')
+def load_data(data_file: str, journal: EventJournal = None) -> List[Dict]:
+    """
+    Cargar el snapshot y reproducir encima los eventos pendientes del journal
+    Se saltan los eventos que el snapshot ya incluye (un corte entre guardarlo
+    y descartarlos del journal); los de journals sin 'seq' se reproducen todos
+    """
+    follows_data = load_snapshot(data_file)
+    if config.REPLAY_STATES_ON_LOAD:
+        # Recalcular los estados desde el historial (datos editados a mano o antiguos)
+        for user in follows_data:
+            utils.replay_user_state(user)
+    if journal is not None:
+        index = utils.build_user_index(follows_data)
+        covered = snapshot_journal_seq(data_file)
+        for entry in journal.read():
+            seq = entry.get('seq')
+            if isinstance(seq, int) and seq <= covered:
+                continue
+            utils.apply_event(follows_data, index, entry['username'],
+                              entry['tipo'], entry['fecha'])
+        # Los eventos nuevos siguen numerándose después de los del snapshot
+        journal.seq = max(journal.seq, covered)
+    return follows_data
+
+def detach_user(user) -> Dict:
+    """
+    Copia de un usuario en el formato del YAML que no cambia si después se
+    registran más eventos (para serializarla en otro hilo)
+    """
+    if isinstance(user, records.UserRecord):
+        return user.to_dict()
+    user = dict(user)
+    if isinstance(user.get('eventos'), list):
+        user['eventos'] = list(user['eventos'])
+    return user
+
+# Usuarios copiados por cada toma de store.lock en UserSnapshot.detach
+SNAPSHOT_CHUNK = 500
+
+class UserSnapshot:
+    """
+    Los usuarios tal como estaban en un instante, copiados después (copy-on-write)
+    Al crearla (con store.lock tomado) sólo se copia la lista de referencias;
+    detach() copia los registros por tramos, tomando el lock en cada tramo, y
+    mientras tanto el store guarda con preserve() una copia de cada usuario
+    antes de cambiarlo. Así un guardado completo no bloquea al hilo de la UI
+    durante la copia de todos los usuarios
+    """
+
+    def __init__(self, users: List, store=None):
+        self.users = users
+        self.store = store
+        # id del registro -> copia anterior a su primer cambio
+        self.originals: Dict[int, Dict] = {}
+        if store is not None:
+            store.snapshots.append(self)
+
+    def preserve(self, user) -> None:
+        """Guardar el usuario como está antes de cambiarlo (con store.lock tomado)"""
+        if id(user) not in self.originals:
+            self.originals[id(user)] = detach_user(user)
+
+    def detach(self) -> List[Dict]:
+        """Copia de los usuarios en el instante de la toma (sin el lock tomado)"""
+        if self.store is None:
+            return self.users
+        detached = []
+        try:
+            for start in range(0, len(self.users), SNAPSHOT_CHUNK):
+                with self.store.lock:
+                    for user in self.users[start:start + SNAPSHOT_CHUNK]:
+                        original = self.originals.get(id(user))
+                        detached.append(original if original is not None else detach_user(user))
+        finally:
+            with self.store.lock:
+                self.store.snapshots.remove(self)
+        return detached
+
+class YamlStore:
+    """
+    Datos en memoria respaldados por el snapshot YAML y el journal de eventos
+    Mantiene el índice por username y una cubeta de usuarios por estado, que
+    sirve tanto para filtrar como para las estadísticas.
+    save() puede llamarse desde otro hilo (WriteBehindSaver): los cambios y la
+    copia de los datos a guardar se protegen con self.lock. Quien aplica un
+    evento y luego lo registra (record_events) debe tomar self.lock durante
+    ambos pasos, o un guardado en medio lo incluiría en el snapshot y además
+    en la parte del journal que se conserva
+    """
+
+    # Los guardados completos pueden hacerse en segundo plano (ver WriteBehindSaver)
+    write_behind = True
+
+    def __init__(self, data_file: str, journal_file: str = None,
+                 compact_records: bool = False):
+        self.data_file = data_file
+        self.journal = EventJournal(journal_file) if journal_file else None
+        # Usuarios como records.UserRecord en lugar de dicts
+        self.compact_records = compact_records
+        self.lock = threading.RLock()
+        # Un solo guardado a la vez
+        self.save_lock = threading.Lock()
+        # Tomas en curso (ver UserSnapshot)
+        self.snapshots: List[UserSnapshot] = []
+        self.set_data([])
+
+    def set_data(self, follows_data: Iterable[Dict]) -> None:
+        """Reemplazar los datos en memoria (carga, restauración o importación)"""
+        if self.compact_records:
+            follows_data = records.compact_users(follows_data)
+        elif not isinstance(follows_data, list):
+            follows_data = list(follows_data)
+        user_index = utils.build_user_index(follows_data)
+        positions = {}
+        for position, user in enumerate(follows_data):
+            positions.setdefault(user.get('username'), position)
+        with self.lock:
+            self.follows_data = follows_data
+            self.user_index = user_index
+            # Posición de cada usuario en follows_data: los filtros sin orden
+            # mantienen el orden del archivo
+            self.positions = positions
+            self.state_buckets = utils.build_state_buckets(user_index)
+            self.sort_index = sort_index.UserSortIndex(user_index)
+            # Series temporales de eventos: se construyen en el primer get_timeseries()
+            self.timeseries = None
+
+    def load(self) -> None:
+        """Cargar el snapshot y el journal"""
+        self.set_data(load_data(self.data_file, self.journal))
+
+    @perf.timed('save_data')
+    def save(self) -> None:
+        """
+        Guardar el snapshot completo y descartar del journal lo que ya incluye
+        Con el lock sólo se toma la lista de usuarios (ver UserSnapshot); la
+        copia y la escritura no bloquean a quien siga registrando eventos
+        """
+        with self.save_lock:
+            with self.lock:
+                snapshot = self.begin_snapshot()
+                position = self.journal.mark() if self.journal is not None else None
+            follows_data = snapshot.detach()
+            save_snapshot(self.data_file, follows_data, position[2] if position else 0)
+            if self.journal is not None:
+                with self.lock:
+                    self.journal.discard_before(position)
+
+    def record_events(self, events: List[Tuple[str, str, str]]) -> bool:
+        """
+        Persistir eventos ya aplicados agregándolos al journal
+        Retorna True si hace falta un guardado completo (sin journal, o cuando
+        el journal llega a JOURNAL_COMPACT_EVERY eventos)
+        """
+        if not events:
+            return False
+        if self.journal is None:
+            return True
+        with self.lock:
+            self.journal.extend(events)
+            return self.journal.pending >= config.JOURNAL_COMPACT_EVERY
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        """Registro de un usuario o None"""
+        return self.user_index.get(username)
+
+    def get_events(self, username: str) -> List[Dict]:
+        """Eventos de un usuario en orden cronológico"""
+        user = self.user_index.get(username)
+        return user.get('eventos', []) if user is not None else []
+
+    def apply_event(self, username: str, event_type: str, fecha: str) -> Dict:
+        """Registrar un evento en memoria (persistirlo con record_events)"""
+        with self.lock:
+            return self.write_event(username, event_type, fecha)
+
+    def write_event(self, username: str, event_type: str, fecha: str) -> Dict:
+        """Aplicar un evento al índice, las cubetas y los órdenes (con self.lock tomado)"""
+        perf.record_count('eventos_aplicados')
+        user = self.user_index.get(username)
+        old_state = None
+        old_keys = None
+        if user is not None:
+            old_state = user.get('estado_actual', 'no_seguido')
+            old_keys = self.sort_index.get_keys(user)
+            for snapshot in self.snapshots:
+                snapshot.preserve(user)
+        user = utils.apply_event(self.follows_data, self.user_index, username, event_type, fecha)
+        if self.compact_records and old_state is None:
+            # Usuario nuevo: utils.apply_event lo agregó al final como dict
+            user = records.UserRecord.from_dict(user)
+            self.follows_data[-1] = user
+            utils.index_user(self.user_index, user)
+        if old_state is None:
+            self.positions[username] = len(self.follows_data) - 1
+        utils.move_user_bucket(self.state_buckets, user, old_state)
+        self.sort_index.update(user, old_keys)
+        if self.timeseries is not None:
+            self.timeseries.add(event_type, fecha)
+        return user
+
+    def apply_events(self, events: Iterable[Tuple[str, str, str]]) -> int:
+        """Registrar un lote de eventos (username, tipo, fecha) en memoria; retorna cuántos"""
+        total = 0
+        with self.lock:
+            for username, event_type, fecha in events:
+                self.write_event(username, event_type, fecha)
+                total += 1
+        return total
+
+    def reconcile(self, followers: Set[str], following: Set[str],
+                  fecha: str) -> List[Tuple[str, str, str]]:
+        """Reconciliar con las listas de seguidores y seguidos (ver utils.plan_reconcile)"""
+        stored = utils.stored_username_map(self.user_index)
+        followers = utils.match_stored_usernames(followers, stored)
+        following = utils.match_stored_usernames(following, stored)
+        # Estados de las cuentas que sigues y de las que aparecen en las listas
+        states = {username: estado for estado in ('seguido', 'mutuo')
+                  for username in self.state_buckets.get(estado, {})}
+        for username in following | followers:
+            user = self.user_index.get(username)
+            if user is not None:
+                states[username] = user.get('estado_actual', 'no_seguido')
+        events = [(username, tipo, fecha)
+                  for username, tipo in utils.plan_reconcile(states, followers, following)]
+        self.apply_events(events)
+        return events
+
+    def filter_users(self, estado: str = "todos", sort_by: str = None,
+                     reverse: bool = False) -> List[Dict]:
+        """
+        Usuarios con un estado_actual dado ('todos' para todos), en O(tamaño de la cubeta)
+        Con sort_by (columna de sort_index.SORT_FIELDS) se recorre el orden precalculado
+        """
+        if sort_by is None:
+            if estado == "todos":
+                return self.follows_data
+            # La cubeta está en el orden de llegada al estado; se devuelve en el del archivo
+            bucket = self.state_buckets.get(estado, {})
+            return [bucket[username] for username in sorted(bucket, key=self.positions.__getitem__)]
+        
+        usernames = self.sort_index.ordered_usernames(sort_by, reverse)
+        if estado == "todos":
+            return [self.user_index[username] for username in usernames]
+        bucket = self.state_buckets.get(estado, {})
+        return [bucket[username] for username in usernames if username in bucket]
+
+    def all_users(self) -> List[Dict]:
+        """Todos los usuarios en el formato del YAML"""
+        if self.compact_records:
+            return records.plain_users(self.follows_data)
+        return self.follows_data
+
+    def begin_snapshot(self) -> UserSnapshot:
+        """Tomar los usuarios en este instante (con self.lock tomado); copiarlos con detach()"""
+        with self.lock:
+            return UserSnapshot(list(self.follows_data), self)
+
+    def snapshot_users(self) -> List[Dict]:
+        """Copia de todos los usuarios en el formato del YAML, segura para usar en otro hilo"""
+        return self.begin_snapshot().detach()
+
+    def iter_users(self) -> Iterator[Dict]:
+        """Usuarios en el formato del YAML, uno a la vez (para exportar sin copiar todo)"""
+        for user in self.follows_data:
+            yield user.to_dict() if isinstance(user, records.UserRecord) else user
+
+    def usernames(self) -> List[str]:
+        """Todos los usernames registrados"""
+        return list(self.user_index)
+
+    def total_users(self) -> int:
+        """Número de usuarios registrados"""
+        return len(self.follows_data)
+
+    def get_state_counts(self) -> Dict[str, int]:
+        """Usuarios por estado: el tamaño de cada cubeta"""
+        return {estado: len(bucket) for estado, bucket in self.state_buckets.items()}
+
+    def verify_state_counts(self) -> bool:
+        """Comprobar las cubetas contra un recuento completo"""
+        return utils.count_states(self.user_index.values()) == self.get_state_counts()
+
+    def get_timeseries(self) -> timeseries.EventTimeSeries:
+        """Eventos por día, semana y mes (se cuentan una vez y luego se mantienen con cada evento)"""
+        with self.lock:
+            if self.timeseries is None:
+                self.timeseries = timeseries.EventTimeSeries.from_users(self.follows_data)
+            return self.timeseries
+
+class WriteBehindSaver:
+    """
+    Guardados completos diferidos y agrupados, en un hilo aparte
+    schedule() pide un guardado; save() se ejecuta cuando pasan delay segundos
+    sin nuevas peticiones, así una ráfaga de cambios produce una sola escritura.
+    Los errores quedan en self.errors para que la UI los muestre desde su hilo
+    """
+
+    def __init__(self, save, delay: float):
+        self.save = save
+        self.delay = delay
+        self.errors = queue.Queue()
+        self.condition = threading.Condition()
+        self.due = None
+        self.saving = False
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def schedule(self) -> None:
+        """Pedir un guardado (reinicia la espera)"""
+        with self.condition:
+            self.due = time.monotonic() + self.delay
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        """Hilo de trabajo: esperar a que se calmen los cambios y guardar"""
+        with self.condition:
+            while True:
+                if self.due is None:
+                    if self.closed:
+                        return
+                    self.condition.wait()
+                    continue
+                remaining = self.due - time.monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+                
+                self.due = None
+                self.saving = True
+                self.condition.release()
+                try:
+                    self.save()
+                except Exception as e:
+                    self.errors.put(e)
+                finally:
+                    self.condition.acquire()
+                    self.saving = False
+                    self.condition.notify_all()
+
+    def flush(self) -> None:
+        """Hacer ya el guardado pendiente (si hay) y esperar a que termine"""
+        with self.condition:
+            if self.due is not None:
+                self.due = time.monotonic()
+                self.condition.notify_all()
+            while self.due is not None or self.saving:
+                self.condition.wait()
+
+    def close(self) -> None:
+        """Guardar lo pendiente y terminar el hilo"""
+        self.flush()
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+def is_main_data_file(data_file: str) -> bool:
+    """Si data_file es config.DATA_FILE (los datos principales)"""
+    return os.path.abspath(data_file) == os.path.abspath(config.DATA_FILE)
+
+def default_journal_file(data_file: str) -> str:
+    """
+    Journal de un archivo de datos: config.JOURNAL_FILE para los datos
+    principales y <nombre>.journal junto a cualquier otro, así nunca se
+    reproduce el journal de otros datos
+    """
+    if is_main_data_file(data_file):
+        return config.JOURNAL_FILE
+    return os.path.splitext(data_file)[0] + '.journal'
+
+def open_store(data_file: str, journal_file: str = None):
+    """
+    Abrir el backend de almacenamiento según la extensión de data_file:
+    .db/.sqlite/.sqlite3 usa SQLite (ver sqlite_store), cualquier otra YAML
+    con journal_file (por defecto default_journal_file) si USE_JOURNAL
+    """
+    if os.path.splitext(data_file)[1].lower() in SQLITE_EXTENSIONS:
+        import sqlite_store
+        return sqlite_store.SQLiteStore(data_file)
+    journal_file = journal_file or default_journal_file(data_file)
+    return YamlStore(data_file, journal_file if config.USE_JOURNAL else None,
+                     config.COMPACT_RECORDS)
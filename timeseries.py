@@ -0,0 +1,222 @@
+"""
+Series temporales de eventos por día, semana y mes
+
+EventTimeSeries cuenta los eventos de cada tipo (seguidos, follow backs,
+dejados de seguir...) por periodo. Se construye una vez recorriendo todos los
+historiales y después cada evento nuevo sólo suma 1 a su día, su semana y su
+mes. Con NumPy instalado el recuento inicial es vectorizado: los eventos de los
+UserRecord ya son arrays de ordinales y códigos, así que se concatenan y se
+cuentan con un solo bincount; sin NumPy se usa un Counter.
+
+rollup() recorre sólo los periodos con eventos (unos miles aunque haya
+millones de eventos) y agrega la tasa de follow back de cada periodo
+(follow backs / seguidos) y la acumulada hasta ese periodo.
+"""
+
+from array import array
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import perf
+import records
+import utils
+
+# NumPy es opcional y sólo acelera la construcción inicial; se importa en el
+# primer uso (ver get_numpy) para no demorar el arranque. False: no instalado
+NUMPY = None
+
+PERIODS = ('dia', 'semana', 'mes')
+PERIOD_LABELS = {'dia': 'Día', 'semana': 'Semana', 'mes': 'Mes'}
+
+# Con un rango de fechas mayor (fechas erróneas muy lejanas) no se usa una
+# tabla densa por día sino numpy.unique
+MAX_DENSE_DAYS = 200000
+
+MONTH_KEY_CACHE: Dict[int, int] = {}
+
+def month_key(ordinal: int) -> int:
+    """Clave del mes de un ordinal: año * 12 + mes - 1"""
+    key = MONTH_KEY_CACHE.get(ordinal)
+    if key is None:
+        day = date.fromordinal(ordinal)
+        key = MONTH_KEY_CACHE[ordinal] = day.year * 12 + day.month - 1
+    return key
+
+def week_key(ordinal: int) -> int:
+    """Clave de la semana de un ordinal: el ordinal de su lunes"""
+    # date.fromordinal(1) es lunes
+    return ordinal - (ordinal - 1) % 7
+
+PERIOD_KEYS = {
+    'dia': lambda ordinal: ordinal,
+    'semana': week_key,
+    'mes': month_key
+}
+
+def period_label(period: str, key: int) -> str:
+    """Texto de un periodo: 2025-01-15, 2025-W03 o 2025-01"""
+    if period == 'dia':
+        return utils.ordinal_to_iso(key)
+    if period == 'semana':
+        year, week, _ = date.fromordinal(key).isocalendar()
+        return f"{year}-W{week:02d}"
+    return f"{key // 12:04d}-{key % 12 + 1:02d}"
+
+def get_numpy():
+    """Módulo numpy, o None si no está instalado"""
+    global NUMPY
+    if NUMPY is None:
+        try:
+            import numpy
+            NUMPY = numpy
+        except ImportError:
+            NUMPY = False
+    return NUMPY or None
+
+def event_ordinal(fecha) -> Optional[int]:
+    """Ordinal de la fecha de un evento ('YYYY-MM-DD' o date), None si no es una fecha"""
+    if type(fecha) is date:
+        return fecha.toordinal()
+    return utils.parse_date(fecha)
+
+def count_days(dates: array, codes: array) -> Iterator[Tuple[int, int, int]]:
+    """
+    Recuento (ordinal, código, eventos) de arrays paralelos de ordinales y códigos
+    Los ordinales negativos (fechas cargadas como date, ver records) cuentan igual
+    """
+    if not dates:
+        return iter(())
+    numpy = get_numpy()
+    if numpy is None:
+        totals = Counter(zip(map(abs, dates), codes))
+        return ((ordinal, code, total) for (ordinal, code), total in totals.items())
+
+    width = len(records.EVENT_CODES)
+    ordinals = numpy.abs(numpy.frombuffer(dates, dtype=dates.typecode).astype(numpy.int64))
+    first = int(ordinals.min())
+    span = int(ordinals.max()) - first + 1
+    flat = (ordinals - first) * width + numpy.frombuffer(codes, dtype=numpy.uint8)
+    if span <= MAX_DENSE_DAYS:
+        totals = numpy.bincount(flat, minlength=span * width)
+        keys = numpy.flatnonzero(totals)
+        totals = totals[keys]
+    else:
+        keys, totals = numpy.unique(flat, return_counts=True)
+    return zip((keys // width + first).tolist(), (keys % width).tolist(), totals.tolist())
+
+class EventTimeSeries:
+    """
+    Eventos por tipo en cada día, semana y mes
+    """
+
+    def __init__(self):
+        # periodo -> clave -> eventos por código de tipo (records.EVENT_CODES)
+        self.buckets: Dict[str, Dict[int, List[int]]] = {period: {} for period in PERIODS}
+        # Claves ordenadas de cada periodo (None cuando aparece un periodo nuevo)
+        self.sorted_keys: Dict[str, Optional[List[int]]] = dict.fromkeys(PERIODS)
+        # Eventos sin fecha 'YYYY-MM-DD' o con un tipo desconocido
+        self.skipped = 0
+
+    @classmethod
+    @perf.timed('timeseries_build')
+    def from_users(cls, users: Iterable[Dict]) -> 'EventTimeSeries':
+        """Construir las series desde los historiales (UserRecord o dicts del YAML)"""
+        dates = array('l')
+        codes = array('B')
+        skipped = 0
+        for user in users:
+            if isinstance(user, records.UserRecord) and user.raw_events is None:
+                dates.extend(user.event_dates)
+                codes.extend(user.event_codes)
+                continue
+            eventos = user.get('eventos')
+            if not isinstance(eventos, list):
+                continue
+            for evento in eventos:
+                ordinal = None
+                code = None
+                if isinstance(evento, dict):
+                    ordinal = event_ordinal(evento.get('fecha'))
+                    code = records.EVENT_CODE_BY_TYPE.get(evento.get('tipo'))
+                if ordinal is None or code is None:
+                    skipped += 1
+                    continue
+                dates.append(ordinal)
+                codes.append(code)
+
+        series = cls()
+        for ordinal, code, total in count_days(dates, codes):
+            series.add_day(ordinal, code, total)
+        series.skipped = skipped
+        return series
+
+    @classmethod
+    def from_counts(cls, counts: Iterable[Tuple[str, str, int]]) -> 'EventTimeSeries':
+        """Construir las series desde recuentos (fecha, tipo, eventos) ya agrupados"""
+        series = cls()
+        for fecha, event_type, total in counts:
+            series.add(event_type, fecha, total)
+        return series
+
+    def add_day(self, ordinal: int, code: int, amount: int = 1) -> None:
+        """Sumar eventos de un tipo a su día, su semana y su mes"""
+        for period, key_of in PERIOD_KEYS.items():
+            key = key_of(ordinal)
+            buckets = self.buckets[period]
+            row = buckets.get(key)
+            if row is None:
+                row = buckets[key] = [0] * len(records.EVENT_CODES)
+                self.sorted_keys[period] = None
+            row[code] += amount
+
+    def add(self, event_type: str, fecha, amount: int = 1) -> None:
+        """Sumar un evento nuevo (sólo cambian tres cubetas)"""
+        ordinal = event_ordinal(fecha)
+        code = records.EVENT_CODE_BY_TYPE.get(event_type)
+        if ordinal is None or code is None:
+            self.skipped += amount
+            return
+        self.add_day(ordinal, code, amount)
+
+    def keys(self, period: str) -> List[int]:
+        """Claves de los periodos con eventos, en orden"""
+        keys = self.sorted_keys[period]
+        if keys is None:
+            keys = self.sorted_keys[period] = sorted(self.buckets[period])
+        return keys
+
+    def rollup(self, period: str = 'mes') -> List[Dict]:
+        """
+        Una fila por periodo con eventos: 'periodo', un total por tipo de evento,
+        'tasa_follow_back' y 'tasa_acumulada' (porcentajes, None sin seguidos)
+        """
+        buckets = self.buckets[period]
+        seguido = records.EVENT_CODE_BY_TYPE['seguido']
+        follow_back = records.EVENT_CODE_BY_TYPE['follow_back']
+        total_seguidos = 0
+        total_follow_backs = 0
+        rows = []
+        for key in self.keys(period):
+            counts = buckets[key]
+            total_seguidos += counts[seguido]
+            total_follow_backs += counts[follow_back]
+            row = {'periodo': period_label(period, key)}
+            row.update(zip(records.EVENT_CODES, counts))
+            row['tasa_follow_back'] = (counts[follow_back] / counts[seguido] * 100
+                                       if counts[seguido] else None)
+            row['tasa_acumulada'] = (total_follow_backs / total_seguidos * 100
+                                     if total_seguidos else None)
+            rows.append(row)
+        return rows
+
+    def totals(self) -> Dict[str, int]:
+        """Eventos por tipo en todo el historial"""
+        totals = [0] * len(records.EVENT_CODES)
+        for counts in self.buckets['mes'].values():
+            for code, total in enumerate(counts):
+                totals[code] += total
+        return dict(zip(records.EVENT_CODES, totals))
+
+def format_rate(rate: Optional[float]) -> str:
+    """Tasa para mostrar, como utils.calculate_follow_back_rate"""
+    return "-" if rate is None else f"{rate:.1f}%"
@@ -2,10 +2,12 @@
 Utilidades para FollowTracker
 """
 
+import os
 import re
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import config
+import perf
 
 def normalize_username(username: str) -> str:
     """
@@ -43,15 +45,56 @@ def validate_username(username: str) -> tuple[bool, str]:
     
     return True, ""
 
+# Cachés de fechas: hay pocas fechas distintas y cada una se repite en muchos
+# eventos, así que cada una se parsea y formatea una sola vez
+DATE_ORDINAL_CACHE: Dict[str, Optional[int]] = {}
+ISO_DATE_CACHE: Dict[int, str] = {}
+DISPLAY_DATE_CACHE: Dict[object, str] = {}
+
+def parse_date(date_str: str) -> Optional[int]:
+    """
+    Ordinal (date.toordinal) de una fecha 'YYYY-MM-DD', o None si no lo es
+    Sólo acepta la forma canónica, así ordinal_to_iso devuelve el mismo texto
+    """
+    ordinal = DATE_ORDINAL_CACHE.get(date_str, False)
+    if ordinal is False:
+        ordinal = None
+        if isinstance(date_str, str) and len(date_str) == 10:
+            try:
+                date_obj = date.fromisoformat(date_str)
+            except ValueError:
+                date_obj = None
+            if date_obj is not None and date_obj.isoformat() == date_str:
+                ordinal = date_obj.toordinal()
+        DATE_ORDINAL_CACHE[date_str] = ordinal
+    return ordinal
+
+def ordinal_to_iso(ordinal: int) -> str:
+    """
+    Fecha 'YYYY-MM-DD' de un ordinal
+    """
+    iso = ISO_DATE_CACHE.get(ordinal)
+    if iso is None:
+        iso = ISO_DATE_CACHE[ordinal] = date.fromordinal(ordinal).isoformat()
+    return iso
+
 def format_date(date_str: str) -> str:
     """
-    Formatear una fecha para mostrar
+    Formatear una fecha para mostrar (DD/MM/YYYY), memorizando el resultado
     """
+    try:
+        return DISPLAY_DATE_CACHE[date_str]
+    except (KeyError, TypeError):
+        pass
+    
     try:
         date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        return date_obj.strftime("%d/%m/%Y")
+        display = date_obj.strftime("%d/%m/%Y")
     except ValueError:
-        return date_str
+        display = date_str
+    if isinstance(date_str, str):
+        DISPLAY_DATE_CACHE[date_str] = display
+    return display
 
 def get_current_date() -> str:
     """
@@ -59,33 +102,58 @@ def get_current_date() -> str:
     """
     return datetime.now().strftime("%Y-%m-%d")
 
-def calculate_user_statistics(follows_data: List[Dict]) -> Dict[str, int]:
+def count_states(follows_data: List[Dict]) -> Dict[str, int]:
     """
-    Calcular estadísticas de usuarios
+    Contar usuarios por estado_actual recorriendo todos los datos
+    Sirve para inicializar los contadores y para verificarlos
     """
-    stats = {
-        'total_usuarios': len(follows_data),
-        'seguidos_actualmente': 0,
-        'te_siguen': 0,
-        'relaciones_mutuas': 0,
-        'dejados_seguir': 0,
-        'no_seguidos': 0
-    }
-    
+    counts = dict.fromkeys(config.USER_STATES, 0)
     for user in follows_data:
         estado = user.get('estado_actual', 'no_seguido')
-        if estado == 'seguido':
-            stats['seguidos_actualmente'] += 1
-        elif estado == 'te_sigue':
-            stats['te_siguen'] += 1
-        elif estado == 'mutuo':
-            stats['relaciones_mutuas'] += 1
-        elif estado == 'seguido_previamente':
-            stats['dejados_seguir'] += 1
-        elif estado == 'no_seguido':
-            stats['no_seguidos'] += 1
-    
-    return stats
+        counts[estado] = counts.get(estado, 0) + 1
+    return counts
+
+def build_state_buckets(index: Dict[str, Dict]) -> Dict[str, Dict[str, Dict]]:
+    """
+    Agrupar los usuarios del índice por estado_actual: estado -> {username: usuario}
+    Los diccionarios conservan el orden de llegada y permiten mover usuarios en O(1)
+    """
+    buckets = {estado: {} for estado in config.USER_STATES}
+    for username, user in index.items():
+        buckets.setdefault(user.get('estado_actual', 'no_seguido'), {})[username] = user
+    return buckets
+
+def move_user_bucket(buckets: Dict[str, Dict[str, Dict]], user: Dict,
+                     old_state: Optional[str]) -> None:
+    """
+    Mover un usuario a la cubeta de su estado_actual actual
+    old_state es None para usuarios nuevos
+    """
+    new_state = user.get('estado_actual', 'no_seguido')
+    if old_state == new_state:
+        return
+    if old_state is not None:
+        buckets.get(old_state, {}).pop(user['username'], None)
+    buckets.setdefault(new_state, {})[user['username']] = user
+
+def calculate_user_statistics(follows_data: Optional[List[Dict]],
+                              state_counts: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Calcular estadísticas de usuarios
+    Si se pasan contadores por estado (ver count_states) no se recorren los datos
+    y follows_data puede ser None
+    """
+    if state_counts is None:
+        state_counts = count_states(follows_data)
+    
+    return {
+        'total_usuarios': sum(state_counts.values()),
+        'seguidos_actualmente': state_counts.get('seguido', 0),
+        'te_siguen': state_counts.get('te_sigue', 0),
+        'relaciones_mutuas': state_counts.get('mutuo', 0),
+        'dejados_seguir': state_counts.get('seguido_previamente', 0),
+        'no_seguidos': state_counts.get('no_seguido', 0)
+    }
 
 def calculate_follow_back_rate(stats: Dict[str, int]) -> str:
     """
@@ -134,24 +202,34 @@ def backup_data(data: List[Dict], backup_file: str = None) -> bool:
         backup_file = config.BACKUP_FILE
     
     try:
-        import yaml
+        import storage
         with open(backup_file, 'w', encoding='utf-8') as file:
-            yaml.dump(data, file, default_flow_style=False, allow_unicode=True)
+            storage.yaml_dump(data, file)
         return True
     except Exception:
         return False
 
-def restore_backup(backup_file: str = None) -> Optional[List[Dict]]:
+def restore_backup(backup_file: str = None, point=None) -> Optional[List[Dict]]:
     """
     Restaurar datos desde backup
+    backup_file puede ser un archivo YAML o un directorio de backups
+    incrementales (por defecto config.BACKUP_DIR si existe); en ese caso point
+    (datetime o texto ISO, None para el más reciente) elige el instante
     """
     if backup_file is None:
-        backup_file = config.BACKUP_FILE
+        backup_file = config.BACKUP_DIR if os.path.isdir(config.BACKUP_DIR) else config.BACKUP_FILE
+    
+    if os.path.isdir(backup_file):
+        import backups
+        try:
+            return backups.BackupManager(backup_file).restore(point)
+        except Exception:
+            return None
     
     try:
-        import yaml
+        import storage
         with open(backup_file, 'r', encoding='utf-8') as file:
-            return yaml.safe_load(file) or []
+            return storage.yaml_load(file) or []
     except Exception:
         return None
 
@@ -202,11 +280,331 @@ def import_from_csv(filename: str) -> Optional[List[Dict]]:
     except Exception:
         return None
 
-def get_user_by_username(follows_data: List[Dict], username: str) -> Optional[Dict]:
+# Formato largo de CSV: una fila por evento, con los campos del usuario repetidos.
+# Los usuarios sin eventos tienen una fila con tipo y fecha vacíos
+CSV_EVENT_FIELDS = ['username', 'estado_actual', 'fecha_primer_seguimiento',
+                    'fecha_ultima_interaccion', 'tipo', 'fecha']
+
+def iter_event_rows(users: Iterable[Dict]) -> Iterator[List]:
+    """
+    Filas del CSV en formato largo (ver CSV_EVENT_FIELDS), usuario por usuario
+    """
+    for user in users:
+        user_fields = [user.get('username', ''), user.get('estado_actual') or '',
+                       user.get('fecha_primer_seguimiento') or '',
+                       user.get('fecha_ultima_interaccion') or '']
+        eventos = user.get('eventos') or []
+        if not eventos:
+            yield user_fields + ['', '']
+        for evento in eventos:
+            yield user_fields + [evento.get('tipo', ''), evento.get('fecha', '')]
+
+def export_events_csv(users: Iterable[Dict], filename: str,
+                      chunk_rows: int = None) -> int:
+    """
+    Exportar usuarios con su historial completo a CSV en formato largo
+    Recorre users una sola vez y escribe por bloques de chunk_rows filas, así
+    que la memoria no depende del tamaño del archivo. Retorna el número de filas
+    """
+    import csv
+    if chunk_rows is None:
+        chunk_rows = config.CSV_CHUNK_ROWS
+    
+    total = 0
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(CSV_EVENT_FIELDS)
+        chunk = []
+        for row in iter_event_rows(users):
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                writer.writerows(chunk)
+                total += len(chunk)
+                chunk.clear()
+        writer.writerows(chunk)
+        total += len(chunk)
+    return total
+
+def iter_events_csv(filename: str) -> Iterator[Dict]:
+    """
+    Leer un CSV en formato largo y generar un registro de usuario a la vez
+    Las filas de un usuario deben ser consecutivas (como las escribe
+    export_events_csv); sólo se guarda en memoria el usuario en curso
+    """
+    import csv
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        user = None
+        for row in csv.DictReader(csvfile):
+            username = row.get('username', '')
+            if user is None or username != user['username']:
+                if user is not None:
+                    yield user
+                user = {
+                    'username': username,
+                    'eventos': [],
+                    'estado_actual': row.get('estado_actual') or 'no_seguido',
+                    'fecha_primer_seguimiento': row.get('fecha_primer_seguimiento') or None,
+                    'fecha_ultima_interaccion': row.get('fecha_ultima_interaccion') or None
+                }
+            if row.get('tipo'):
+                user['eventos'].append({'tipo': row['tipo'], 'fecha': row.get('fecha', '')})
+        if user is not None:
+            yield user
+
+def build_user_index(follows_data: List[Dict]) -> Dict[str, Dict]:
+    """
+    Construir un índice username -> registro de usuario
+    Si hay usernames repetidos se conserva el primero, igual que una búsqueda lineal
+    """
+    index = {}
+    for user in follows_data:
+        index.setdefault(user.get('username'), user)
+    return index
+
+def index_user(index: Dict[str, Dict], user: Dict) -> None:
+    """
+    Agregar (o reemplazar) un usuario en el índice
+    """
+    index[user.get('username')] = user
+
+# Estado resultante de cada tipo de evento: (estado_actual, tipo) -> nuevo estado.
+# Sólo 'dejado_de_seguir' depende del estado previo: si se venía de 'mutuo'
+# (el evento anterior fue un follow_back) él/ella te sigue todavía
+EVENT_RESULT_STATES = {
+    'seguido': 'seguido',
+    'follow_back': 'mutuo',
+    'te_sigue': 'te_sigue',
+    'dejado_de_seguir': 'seguido_previamente'
+}
+STATE_TRANSITIONS = {(estado, tipo): nuevo
+                     for estado in config.USER_STATES
+                     for tipo, nuevo in EVENT_RESULT_STATES.items()}
+STATE_TRANSITIONS[('mutuo', 'dejado_de_seguir')] = 'te_sigue'
+
+def transition_state(estado: str, event_type: str) -> str:
+    """
+    Nuevo estado_actual a partir del estado actual y el tipo de evento, en O(1)
+    Un tipo de evento desconocido no cambia el estado
+    """
+    return STATE_TRANSITIONS.get((estado, event_type), estado)
+
+@perf.timed('update_user_state')
+def update_user_state(user: Dict, event_type: Optional[str] = None) -> None:
+    """
+    Actualizar el estado de un usuario tras registrar un evento
+    Con event_type se usa la tabla de transiciones sobre el estado cacheado;
+    sin él (o si el usuario no tiene estado) se recorre el historial completo
+    """
+    if event_type is not None and 'estado_actual' in user:
+        user['estado_actual'] = transition_state(user['estado_actual'], event_type)
+    else:
+        replay_user_state(user)
+
+def replay_user_state(user: Dict) -> None:
+    """
+    Recalcular el estado de un usuario recorriendo todos sus eventos
+    Es la semántica de referencia; transition_state la reproduce en O(1)
+    """
+    eventos = user.get('eventos', [])
+    
+    if not eventos:
+        user['estado_actual'] = 'no_seguido'
+        return
+    
+    # Obtener último evento
+    ultimo_evento = eventos[-1]['tipo']
+    
+    if ultimo_evento == "seguido":
+        # Verificar si hay follow_back después del seguimiento
+        seguido_index = None
+        for i, evento in enumerate(eventos):
+            if evento['tipo'] == "seguido":
+                seguido_index = i
+        
+        if seguido_index is not None:
+            # Buscar follow_back después del seguimiento
+            for evento in eventos[seguido_index:]:
+                if evento['tipo'] == "follow_back":
+                    user['estado_actual'] = 'mutuo'
+                    return
+        
+        user['estado_actual'] = 'seguido'
+    elif ultimo_evento == "follow_back":
+        # Follow back significa que ambos se siguen mutuamente
+        user['estado_actual'] = 'mutuo'
+    elif ultimo_evento == "te_sigue":
+        # Él/ella te sigue sin que tú lo sigas
+        user['estado_actual'] = 'te_sigue'
+    elif ultimo_evento == "dejado_de_seguir":
+        # Si el último evento es "dejado_de_seguir", verificar el contexto
+        # Si venía de un estado mutuo, ahora él te sigue pero tú no lo sigues
+        if len(eventos) >= 2:
+            evento_anterior = eventos[-2]['tipo']
+            if evento_anterior == "follow_back":
+                user['estado_actual'] = 'te_sigue'
+            else:
+                user['estado_actual'] = 'seguido_previamente'
+        else:
+            user['estado_actual'] = 'seguido_previamente'
+
+def apply_event(follows_data: List[Dict], index: Dict[str, Dict], username: str,
+                event_type: str, fecha: str = None) -> Dict:
+    """
+    Registrar un evento para un usuario (creándolo si no existe)
+    Actualiza fechas, estado e índice. Retorna el registro del usuario
+    """
+    if fecha is None:
+        fecha = get_current_date()
+    
+    user = index.get(username)
+    if user is not None:
+        user.setdefault('eventos', []).append({'tipo': event_type, 'fecha': fecha})
+        
+        if event_type == "seguido" and not user.get('fecha_primer_seguimiento'):
+            user['fecha_primer_seguimiento'] = fecha
+        
+        user['fecha_ultima_interaccion'] = fecha
+    else:
+        user = {
+            'username': username,
+            'eventos': [{'tipo': event_type, 'fecha': fecha}],
+            'fecha_primer_seguimiento': fecha if event_type == "seguido" else None,
+            'fecha_ultima_interaccion': fecha
+        }
+        follows_data.append(user)
+        index_user(index, user)
+    
+    update_user_state(user, event_type)
+    return user
+
+def iter_export_usernames(data) -> Iterator[str]:
+    """
+    Recorrer los usernames de una exportación JSON de la plataforma
+    Acepta el formato de Instagram (string_list_data / relationships_following),
+    listas de strings y listas de objetos con clave 'username'
+    """
+    if isinstance(data, str):
+        yield data
+    elif isinstance(data, list):
+        for item in data:
+            yield from iter_export_usernames(item)
+    elif isinstance(data, dict):
+        if 'string_list_data' in data:
+            for entry in data['string_list_data']:
+                if entry.get('value'):
+                    yield entry['value']
+        elif 'username' in data:
+            yield data['username']
+        else:
+            for value in data.values():
+                if isinstance(value, (list, dict)):
+                    yield from iter_export_usernames(value)
+
+def read_account_list(filename: str) -> Set[str]:
+    """
+    Leer una lista de cuentas (seguidores o seguidos) exportada de la plataforma
+    Soporta JSON, CSV (columna 'username' o la primera columna) y texto plano
+    """
+    if filename.lower().endswith('.json'):
+        import json
+        with open(filename, 'r', encoding='utf-8') as file:
+            usernames = iter_export_usernames(json.load(file))
+            return {normalize_username(name) for name in usernames if name.strip()}
+    
+    import csv
+    accounts = set()
+    with open(filename, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        column = 0
+        for i, row in enumerate(reader):
+            if i == 0 and 'username' in row:
+                column = row.index('username')
+                continue
+            if len(row) > column and row[column].strip():
+                accounts.add(normalize_username(row[column]))
+    return accounts
+
+def stored_username_map(usernames: Iterable[str]) -> Dict[str, str]:
+    """
+    Usernames registrados por su versión en minúsculas (ver match_stored_usernames)
+    Si dos sólo difieren en mayúsculas gana el que ya está en minúsculas
+    """
+    stored = {}
+    for username in usernames:
+        key = username.lower()
+        if username == key or key not in stored:
+            stored[key] = username
+    return stored
+
+def match_stored_usernames(accounts: Set[str], stored: Dict[str, str]) -> Set[str]:
+    """
+    Cuentas de una exportación con el username tal como está registrado
+    Las plataformas no distinguen mayúsculas y read_account_list las pasa a
+    minúsculas, pero los usernames registrados a mano conservan las suyas
+    """
+    return {stored.get(username.lower(), username) for username in accounts}
+
+def plan_reconcile(states: Dict[str, str], followers: Set[str],
+                   following: Set[str]) -> List[Tuple[str, str]]:
+    """
+    Calcular los eventos (username, tipo) que llevan cada estado a lo que dicen
+    las listas completas de seguidores y seguidos
+    states debe incluir el estado de todas las cuentas registradas que estén en
+    alguna lista o que sigues actualmente
+    
+    Que alguien deje de seguirte no es ningún tipo de evento, así que hay dos
+    casos que no se pueden registrar y esas cuentas quedan como están:
+    - 'mutuo' que ya no te sigue (lo sigas todavía o no)
+    - 'te_sigue' que ya no te sigue, ni está en la lista de seguidores
+    """
+    # Cuentas que sigues hoy según los datos
+    following_now = {username for username, estado in states.items()
+                     if estado in ('seguido', 'mutuo')}
+    
+    # Sólo pueden cambiar las cuentas de alguna lista o que sigues actualmente
+    events = []
+    for username in sorted(following | followers | following_now):
+        estado = states.get(username, 'no_seguido')
+        lo_sigues = username in following
+        te_sigue = username in followers
+        
+        if lo_sigues and te_sigue:
+            if estado == 'seguido':
+                tipos = ['follow_back']
+            elif estado == 'mutuo':
+                tipos = []
+            else:
+                tipos = ['seguido', 'follow_back']
+        elif lo_sigues:
+            # Un 'mutuo' que ya no te sigue no se puede registrar
+            tipos = [] if estado in ('seguido', 'mutuo') else ['seguido']
+        elif te_sigue:
+            if estado == 'mutuo':
+                tipos = ['dejado_de_seguir']
+            elif estado == 'seguido':
+                tipos = ['dejado_de_seguir', 'te_sigue']
+            elif estado == 'te_sigue':
+                tipos = []
+            else:
+                tipos = ['te_sigue']
+        else:
+            # 'dejado_de_seguir' desde 'mutuo' dejaría 'te_sigue', y tampoco te
+            # sigue: 'mutuo' y 'te_sigue' quedan como están
+            tipos = ['dejado_de_seguir'] if estado == 'seguido' else []
+        
+        events.extend((username, tipo) for tipo in tipos)
+    
+    return events
+
+def get_user_by_username(follows_data: List[Dict], username: str,
+                         index: Optional[Dict[str, Dict]] = None) -> Optional[Dict]:
     """
     Buscar usuario por nombre de usuario
+    Si se pasa un índice (ver build_user_index) la búsqueda es O(1)
     """
     normalized_username = normalize_username(username)
+    if index is not None:
+        return index.get(normalized_username)
     for user in follows_data:
         if user.get('username') == normalized_username:
             return user